@@ -0,0 +1,236 @@
+import numpy as np
+
+from batch import CRASHED, LANDED, NONE, BatchLander
+from engine import NOOP, THRUST
+from landscape import Landscape
+
+
+class SpatialHash:
+    # Uniform grid over the world, wrapping in x like the landscape; items are sorted by cell key so each
+    # cell's members are one contiguous slice and a lookup is a pair of binary searches
+    def __init__(self, cell, width, height):
+        self.columns = max(1, int(width // cell))
+        # Cells are stretched slightly so the columns tile the wrapped width exactly
+        self.cell_width = width / self.columns
+        self.cell_height = cell
+        self.rows = int(height // cell) + 1
+        self.order = np.zeros(0, dtype=np.int64)
+        self.sorted = np.zeros(0, dtype=np.int64)
+
+    def cells(self, x, y):
+        # (column, row) of world points; columns wrap, rows clamp to the grid
+        column = np.floor_divide(x, self.cell_width).astype(np.int64) % self.columns
+        row = np.clip(np.floor_divide(y, self.cell_height).astype(np.int64), 0, self.rows - 1)
+        return column, row
+
+    def key(self, column, row):
+        return column * self.rows + row
+
+    def build(self, keys):
+        # Items are identified by their position in keys
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted = keys[self.order]
+
+    def query(self, keys):
+        # (query index, item index) for every item in each query's cell
+        lo = np.searchsorted(self.sorted, keys, 'left')
+        counts = np.searchsorted(self.sorted, keys, 'right') - lo
+        query = np.repeat(np.arange(len(keys)), counts)
+        first = np.cumsum(counts) - counts
+        slot = np.arange(len(query)) + np.repeat(lo - first, counts)
+        return query, self.order[slot]
+
+    def neighbours(self, column, row):
+        # Keys of half the 3x3 block around each cell, as (keys, valid) pairs: the cell itself and the four
+        # neighbours after it, so every pair of adjacent cells is visited from exactly one side.
+        # Rows past the grid edge are marked invalid
+        offsets = []
+        for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+            r = row + dy
+            valid = (r >= 0) & (r < self.rows)
+            offsets.append((self.key((column + dx) % self.columns, r), valid))
+        return offsets
+
+
+def line_pads(landscape):
+    # Every landable line of the landscape as a zero-height pad scoring that line's zone multiplier
+    landable = np.frombuffer(landscape.landable, dtype=bool)
+    x1 = np.frombuffer(landscape.x1, dtype=np.float32)[landable]
+    x2 = np.frombuffer(landscape.x2, dtype=np.float32)[landable]
+    y = np.frombuffer(landscape.y1, dtype=np.float32)[landable]
+    multiplier = np.frombuffer(landscape.multiplier, dtype=np.int32)[landable]
+    return np.column_stack([np.minimum(x1, x2), y, np.maximum(x1, x2), y, multiplier]).astype(np.float64)
+
+
+def sprite_pads(sprites):
+    # Pads from anything with a rect and a bonus_multiplier, e.g. the sprites in a game.Map's landing_pads group
+    return np.array([(s.rect.left, s.rect.top, s.rect.right, s.rect.bottom, s.bonus_multiplier) for s in sprites],
+                    dtype=np.float64).reshape(-1, 5)
+
+
+def arrivals(pads):
+    # For each entry, how many earlier entries name the same pad
+    order = np.argsort(pads, kind='stable')
+    ranked = pads[order]
+    rank = np.empty(len(pads), dtype=np.int64)
+    rank[order] = np.arange(len(pads)) - np.searchsorted(ranked, ranked, 'left')
+    return rank
+
+
+class Arena:
+    # n landers sharing one landscape and one set of pads, stepped as a batch.BatchLander.
+    # Landers that touch each other crash (a parked lander survives being hit); a landing on a pad pays its
+    # bonus_multiplier divided by one plus the number of landers already parked there.
+    # Crashed landers are frozen like landed ones until reset.
+    def __init__(self, n, landscape=None, pads=None, initial_fuel=1000, cell=None):
+        self.landscape = landscape if landscape is not None else Landscape()
+        self.n = n
+        self.lander = BatchLander(n, self.landscape, initial_fuel=initial_fuel)
+        size = self.lander.size
+        width, height = self.lander.segments.width, self.lander.segments.height
+        # Two landers can only touch when their centres are under a box width apart, so a cell that wide
+        # keeps every touching pair within neighbouring cells
+        self.grid = SpatialHash(cell or 2 * size, width, height)
+
+        # Pads are (left, top, right, bottom, bonus_multiplier) rows
+        self.pads = line_pads(self.landscape) if pads is None else np.asarray(pads, dtype=np.float64).reshape(-1, 5)
+        self.pad_grid = SpatialHash(cell or 2 * size, width, height)
+        self.index_pads()
+
+        self.crashed = np.zeros(n, dtype=bool)
+        self.pad = np.full(n, -1, dtype=np.int64)
+        self.occupancy = np.zeros(len(self.pads), dtype=np.int64)
+
+    def index_pads(self):
+        # Each pad goes into every cell its rect, grown by the lander half-size, overlaps; pads never move,
+        # so one lookup of a lander's own cell finds every pad its box could touch
+        size = self.lander.size
+        grid = self.pad_grid
+        keys, owners = [], []
+        for p, (left, top, right, bottom, _) in enumerate(self.pads):
+            first = int(np.floor((left - size) / grid.cell_width))
+            last = int(np.floor((right + size) / grid.cell_width))
+            columns = np.arange(first, last + 1) % grid.columns
+            rows = np.arange(max(0, int((top - size) // grid.cell_height)),
+                             min(grid.rows - 1, int((bottom + size) // grid.cell_height)) + 1)
+            cells = np.unique(grid.key(columns[:, None], rows[None, :]))
+            keys.append(cells)
+            owners.append(np.full(len(cells), p))
+        self.pad_owner = np.concatenate(owners) if owners else np.zeros(0, dtype=np.int64)
+        grid.build(np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64))
+
+    def reset(self, position, mask=None, velocity=0):
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.lander.reset(position, mask, velocity)
+        self.crashed[mask] = False
+        self.pad[mask] = -1
+        self.update_occupancy()
+
+    def update_occupancy(self):
+        parked = self.pad >= 0
+        self.occupancy = np.bincount(self.pad[parked], minlength=len(self.pads))
+
+    def wrapped(self, dx):
+        width = self.lander.segments.width
+        return (dx + width / 2) % width - width / 2
+
+    def pad_contacts(self, flying):
+        # Index of the first pad each flying lander's box touches, or -1
+        x, y = self.lander.position[:, 0], self.lander.position[:, 1]
+        size = self.lander.size
+        landers = np.flatnonzero(flying)
+        if not len(landers) or not len(self.pads):
+            return np.full(self.n, -1, dtype=np.int64)
+        contact = np.full(self.n, np.iinfo(np.int64).max)
+        column, row = self.pad_grid.cells(x[landers], y[landers])
+        query, slot = self.pad_grid.query(self.pad_grid.key(column, row))
+        who, pad = landers[query], self.pad_owner[slot]
+        left, top, right, bottom = self.pads[pad, 0], self.pads[pad, 1], self.pads[pad, 2], self.pads[pad, 3]
+        # Pads are in tile coordinates; bring each one to the copy nearest the lander
+        shift = x[who] - self.wrapped(x[who] - (left + right) / 2) - (left + right) / 2
+        hit = ((x[who] + size >= left + shift) & (x[who] - size <= right + shift)
+               & (y[who] + size >= top) & (y[who] - size <= bottom))
+        # Lowest pad index wins when a box touches several
+        np.minimum.at(contact, who[hit], pad[hit])
+        contact[contact == np.iinfo(np.int64).max] = -1
+        return contact
+
+    def lander_contacts(self, flying):
+        # Mask of flying landers whose box touches another live lander's box
+        lander = self.lander
+        live = np.flatnonzero(~self.crashed)
+        hit = np.zeros(self.n, dtype=bool)
+        if len(live) < 2:
+            return hit
+        x, y = lander.position[live, 0], lander.position[live, 1]
+        column, row = self.grid.cells(x, y)
+        self.grid.build(self.grid.key(column, row))
+        reach = 2 * lander.size
+        for offset, (keys, valid) in enumerate(self.grid.neighbours(column, row)):
+            query, other = self.grid.query(np.where(valid, keys, -1))
+            if offset == 0:
+                # Within one cell each pair is found from both sides; keep one
+                keep = query < other
+                query, other = query[keep], other[keep]
+            touching = (np.abs(self.wrapped(x[query] - x[other])) <= reach) & (np.abs(y[query] - y[other]) <= reach)
+            hit[live[query[touching]]] = True
+            hit[live[other[touching]]] = True
+        # On a world under three cells wide neighbouring columns alias and a pair can repeat; the mask is unaffected
+        return hit & flying
+
+    def step(self, actions):
+        # Returns the batch.NONE/LANDED/CRASHED code of every lander for this step
+        lander = self.lander
+        flying = ~lander.landed
+        actions = np.where(flying, np.asarray(actions, dtype=np.int64), NOOP)
+        lander.step(actions)
+
+        codes, line = lander.check_collision()
+        codes[~flying] = NONE
+        touched = np.maximum(line, 0)
+        multiplier = np.where(line >= 0, lander.segments.multiplier[touched], 1).astype(np.float64)
+        ground = np.where(line >= 0, lander.segments.y1[touched], 0).astype(np.float64)
+
+        # Pads take precedence over landable terrain under them; the landing rules are those of
+        # engine.Lander.find_contact, so a box that also touches terrain it cannot land on still crashes
+        pad = self.pad_contacts(flying)
+        pad[(line >= 0) & ~lander.segments.landable[touched]] = -1
+        on_pad = pad >= 0
+        gentle = ((np.abs(lander.angle) <= 5) & (np.abs(lander.velocity[:, 0]) <= 0.5)
+                  & (np.abs(lander.velocity[:, 1]) <= 0.5))
+        codes[on_pad] = np.where(gentle[on_pad], LANDED, CRASHED)
+        codes[self.lander_contacts(flying)] = CRASHED
+
+        # Landings on a pad are resolved in lander order, each one counting against those after it
+        parking = (codes == LANDED) & on_pad
+        safe = np.maximum(pad, 0)
+        queue = self.occupancy[pad[parking]] + arrivals(pad[parking])
+        multiplier[parking] = self.pads[pad[parking], 4] / (1 + queue)
+        ground[on_pad] = self.pads[safe, 1][on_pad]
+        lander.handle_landing(codes, line, multiplier, ground)
+
+        self.pad[parking] = pad[parking]
+        self.crashed |= codes == CRASHED
+        lander.landed |= self.crashed
+        self.update_occupancy()
+        return codes
+
+
+if __name__ == "__main__":
+    import time
+
+    landscape = Landscape()
+    rng = np.random.default_rng(0)
+    n = 200
+    arena = Arena(n, landscape)
+    arena.reset(np.column_stack([rng.uniform(0, landscape.width, n), rng.uniform(0, 300, n)]))
+    steps = 0
+    began = time.perf_counter()
+    while not arena.lander.landed.all() and steps < 3000:
+        arena.step(np.where(arena.lander.velocity[:, 1] > 0.4, THRUST, NOOP))
+        steps += 1
+    elapsed = time.perf_counter() - began
+    print(f"{n} landers, {steps} steps in {elapsed:.2f}s ({steps / elapsed:.0f} steps/s): "
+          f"{int((arena.pad >= 0).sum())} on pads, {int(arena.crashed.sum())} crashed, "
+          f"score {arena.lander.score.sum():.0f}")
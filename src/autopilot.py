@@ -0,0 +1,362 @@
+import argparse
+import bisect
+import hashlib
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from batch import LANDED, NONE, BatchLander, HeightMapArrays
+from engine import FPS, NOOP, ROTATE_LEFT, ROTATE_RIGHT, THRUST
+from landscape import Landscape
+
+# Table entries index into ACTIONS
+ACTIONS = (NOOP, ROTATE_LEFT, ROTATE_RIGHT, THRUST)
+# Bumped whenever the model or the grid changes, so stale cached tables are never loaded
+VERSION = 1
+
+CACHE_DIR = os.environ.get('LANDER_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'lunar_lander'))
+
+LAND_REWARD = 100.0
+CRASH_REWARD = -100.0
+# Charged per decision and per frame of thrust, so the autopilot neither hovers nor wastes fuel
+STEP_COST = 0.1
+FUEL_COST = 0.02
+# Touchdown speed the plan aims under: below engine.Lander.gentle's 0.5, so rounding the state to the nearest
+# node at lookup time cannot turn a planned landing into a crash
+SAFE_SPEED = 0.4
+# How far from the middle of a landing spot the plan aims to touch down
+SPOT_RADIUS = 2.0
+
+
+class Grid:
+    # Nodes of the discretized state. The target angle, in rotation steps, and the fuel level pick a slice of the
+    # table; within a slice the nodes are the height of the lander box above the terrain, vy, vx, and the x offset
+    # of the nearest landing spot. Planning interpolates between those nodes, lookups take the nearest
+    def __init__(self, rotation_step=15, max_angle=45, fuel=(0, 1, 60, 240), initial_fuel=1000, max_height=650.0,
+                 heights=25, vy=None, vx=(-2.0, 2.0, 17), max_offset=450.0, offsets=17):
+        self.rotation_step = rotation_step
+        steps = max_angle // rotation_step
+        self.angle = np.arange(-steps, steps + 1) * rotation_step
+        # Lower bound of each fuel level, and how much fuel the level spans
+        self.fuel = np.array(fuel, dtype=np.int64)
+        self.fuel_span = np.diff(np.append(self.fuel, initial_fuel)).clip(1)
+        # Height and offset nodes bunch up near zero, where the decisions matter
+        self.height = max_height * np.linspace(0, 1, heights) ** 2
+        # vy nodes are finest around the landing speed, where rounding to a node decides between landing and crashing
+        self.vy = np.asarray(vy, dtype=np.float64) if vy is not None else np.concatenate(
+            [[-1.5, -1.0], np.arange(-0.5, 1.5, 0.125), np.arange(1.5, 3.6, 0.5)])
+        self.vx = np.linspace(*vx)
+        u = np.linspace(-1, 1, offsets)
+        self.offset = max_offset * u * np.abs(u)
+        self.axes = (self.height, self.vy, self.vx, self.offset)
+        self.shape = (len(self.angle), len(self.fuel)) + tuple(len(nodes) for nodes in self.axes)
+        # Midpoints between nodes, and the same as lists for the scalar lookup
+        self.bounds = [(nodes[1:] + nodes[:-1]) / 2 for nodes in self.axes]
+        self.bound_lists = [bounds.tolist() for bounds in self.bounds]
+        self.fuel_list = self.fuel.tolist()
+
+    def key(self):
+        return (self.rotation_step, self.angle.tolist(), self.fuel.tolist(), self.fuel_span.tolist(),
+                *(nodes.tolist() for nodes in self.axes))
+
+    def index(self, angle, fuel, height, vy, vx, offset):
+        # Flat table index of the nearest node, for arrays of states
+        steps = len(self.angle) // 2
+        a = np.clip(np.rint(np.asarray(angle) / self.rotation_step), -steps, steps).astype(np.int64) + steps
+        f = np.maximum(np.searchsorted(self.fuel, fuel, 'right') - 1, 0)
+        nearest = (np.searchsorted(bounds, value) for bounds, value in zip(self.bounds, (height, vy, vx, offset)))
+        return np.ravel_multi_index((a, f, *nearest), self.shape)
+
+    def scalar_index(self, angle, fuel, height, vy, vx, offset):
+        steps = len(self.angle) // 2
+        index = min(steps, max(-steps, round(angle / self.rotation_step))) + steps
+        index = index * len(self.fuel) + max(0, bisect.bisect_right(self.fuel_list, fuel) - 1)
+        for bounds, value, count in zip(self.bound_lists, (height, vy, vx, offset), self.shape[2:]):
+            index = index * count + bisect.bisect_left(bounds, value)
+        return index
+
+
+def on_target(vx, vy, offset):
+    return (np.abs(vx) <= SAFE_SPEED) & (np.abs(vy) <= SAFE_SPEED) & (np.abs(offset) <= SPOT_RADIUS)
+
+
+def locate(nodes, values):
+    # Lower node index and interpolation weight of each value, clamped to the node range
+    i = np.clip(np.searchsorted(nodes, values, 'right') - 1, 0, len(nodes) - 2)
+    w = np.clip((values - nodes[i]) / (nodes[i + 1] - nodes[i]), 0, 1)
+    return i, w
+
+
+def advance(grid, gravity, thrust_power, frames, angle=None):
+    # Every node of a table slice after `frames` frames, thrusting along angle (degrees) when given.
+    # Returns the 16 interpolation corners and weights of the end state, whether the ground was reached, and
+    # whether the lander was then on target for a landing
+    h, vy, vx, offset = np.meshgrid(*grid.axes, indexing='ij')
+    ax, ay = 0.0, gravity
+    if angle is not None:
+        ax = thrust_power * np.sin(np.radians(angle))
+        ay = gravity - thrust_power * np.cos(np.radians(angle))
+    # Per frame the velocity changes first and then moves the lander, as in engine.Lander
+    ramp = frames * (frames + 1) / 2
+    fall = frames * vy + ay * ramp
+    slide = frames * vx + ax * ramp
+    end = (h - fall, vy + frames * ay, vx + frames * ax, offset - slide)
+    contact = end[0] <= 0
+    t = np.clip(h / np.where(fall > 0, fall, 1), 0, 1)
+    landing = on_target(vx + t * (end[2] - vx), vy + t * (end[1] - vy), offset - t * slide)
+
+    located = [locate(nodes, values.ravel()) for nodes, values in zip(grid.axes, end)]
+    corners, weights = [], []
+    for bits in itertools.product((0, 1), repeat=len(located)):
+        index, weight = 0, 1
+        for (i, w), count, bit in zip(located, grid.shape[2:], bits):
+            index = index * count + i + bit
+            weight = weight * (w if bit else 1 - w)
+        corners.append(index)
+        weights.append(weight)
+    return (np.array(corners, dtype=np.int32), np.array(weights, dtype=np.float32), contact.ravel(),
+            landing.ravel())
+
+
+def interpolate(values, corners, weights):
+    # values is (slices, cells); returns the interpolated value of every end state in every slice
+    out = values[:, corners[0]] * weights[0]
+    for corner, weight in zip(corners[1:], weights[1:]):
+        out += values[:, corner] * weight
+    return out
+
+
+def plan(grid, gravity=0.02, thrust_power=0.04, frames=8, rotation_delay=150, tolerance=1e-2, iterations=1000,
+         progress=None):
+    # Value iteration over the grid with one decision every `frames` frames. A rotation only goes through
+    # when the rotation delay has passed, modelled as happening with probability frames / delay; a level's worth
+    # of thrust likewise moves the lander down a fuel level with probability frames / span.
+    # progress, when given, is called as progress(iteration, change) after every sweep.
+    # Returns the table of indices into ACTIONS, shaped like the grid
+    A, F = grid.shape[:2]
+    cells = int(np.prod(grid.shape[2:]))
+    level = (grid.angle == 0)[:, None, None]
+    outcome = lambda landing: np.where(level & landing, LAND_REWARD, CRASH_REWARD).astype(np.float32)
+
+    corners, weights, contact, landing = advance(grid, gravity, thrust_power, frames)
+    coast_end = outcome(landing)
+    burns = [advance(grid, gravity, thrust_power, frames, angle) for angle in grid.angle]
+    burn_end = np.stack([outcome(burn[3])[a] for a, burn in enumerate(burns)])
+    burn_contact = np.stack([burn[2] for burn in burns])[:, None, :]
+
+    # Touching the ground ends the episode there and then; height is the slowest axis, so those are the first cells
+    on_ground = np.arange(cells) < cells // len(grid.height)
+    _, vy, vx, offset = np.meshgrid(*grid.axes, indexing='ij')
+    ground = np.broadcast_to(outcome(on_target(vx, vy, offset).ravel()), (A, F, cells))[:, :, on_ground]
+
+    turn = min(1.0, frames * 1000 / FPS / rotation_delay)
+    drain = np.minimum(1.0, frames / grid.fuel_span)[None, 1:, None].astype(np.float32)
+    value = np.full((A, F, cells), CRASH_REWARD, dtype=np.float32)
+    for iteration in range(1, iterations + 1):
+        coast = interpolate(value.reshape(A * F, cells), corners, weights).reshape(A, F, cells)
+        noop = np.where(contact, coast_end, coast - STEP_COST)
+        left = np.concatenate([coast[:1], turn * coast[:-1] + (1 - turn) * coast[1:]])
+        right = np.concatenate([turn * coast[1:] + (1 - turn) * coast[:-1], coast[-1:]])
+        left = np.where(contact, coast_end, left - STEP_COST)
+        right = np.where(contact, coast_end, right - STEP_COST)
+        burn = np.stack([interpolate(value[a], burn_corners, burn_weights)
+                         for a, (burn_corners, burn_weights, _, _) in enumerate(burns)])
+        burn = (1 - drain) * burn[:, 1:] + drain * burn[:, :-1]
+        burn = np.where(burn_contact, burn_end, burn - STEP_COST - FUEL_COST * frames)
+        # With an empty tank thrusting is coasting; never prefer it
+        burn = np.concatenate([noop[:, :1] - 1, burn], axis=1)
+
+        q = np.stack([noop, left, right, burn])
+        best = q.max(axis=0)
+        best[:, :, on_ground] = ground
+        change = np.abs(best - value).max()
+        value = best
+        if progress is not None:
+            progress(iteration, change)
+        if change < tolerance:
+            break
+    return q.argmax(axis=0).astype(np.int8).reshape(grid.shape)
+
+
+def cache_path(grid, gravity, thrust_power, frames, rotation_delay, cache_dir=CACHE_DIR):
+    # Tables are keyed by everything that shapes them
+    key = repr((VERSION, FPS, gravity, thrust_power, frames, rotation_delay, LAND_REWARD, CRASH_REWARD, STEP_COST,
+                FUEL_COST, SAFE_SPEED, SPOT_RADIUS, grid.key()))
+    return os.path.join(cache_dir, f"autopilot-{hashlib.sha1(key.encode()).hexdigest()[:16]}.npy")
+
+
+def print_progress(iteration, change):
+    # plan() progress on stderr, for callers that would otherwise sit silent for minutes
+    if iteration == 1:
+        print("planning the autopilot table; this takes minutes the first time and is cached after. Ctrl-C cancels, "
+              "and `python src/autopilot.py --build` does it ahead of time", file=sys.stderr)
+    if iteration % 10 == 0:
+        print(f"  sweep {iteration}: largest value change {change:.3f}", file=sys.stderr, flush=True)
+
+
+def load_table(grid, gravity=0.02, thrust_power=0.04, frames=8, rotation_delay=150, cache_dir=CACHE_DIR,
+               rebuild=False, progress=None):
+    # Memory-maps the cached table, planning and saving it first when there is none. An interrupted plan
+    # leaves nothing behind
+    path = cache_path(grid, gravity, thrust_power, frames, rotation_delay, cache_dir)
+    if not rebuild and os.path.exists(path):
+        # A file that is unreadable or not shaped like the grid is planned again rather than trusted
+        try:
+            table = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            table = None
+        if table is not None and table.shape == grid.shape and table.dtype == np.int8:
+            return table
+    table = plan(grid, gravity, thrust_power, frames, rotation_delay, progress=progress)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under a temporary name and renamed, so parallel runs never read half a table
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            np.save(f, table)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return np.load(path, mmap_mode='r')
+
+
+def landing_spots(landscape, heights, size=15):
+    # x of the middle of every run of heightmap columns where a level lander settling straight down lands,
+    # found by dropping one batch.BatchLander per column just above the ground. That takes in the box and the
+    # collision rules, which landable lines alone do not
+    x = (np.arange(heights.columns) + 0.5) * heights.resolution
+    top = np.minimum.reduce([heights.ground_at(x + dx) for dx in range(-size, size + 1)])
+    lander = BatchLander(len(x), landscape)
+    lander.reset(np.column_stack([x, top - size - 1]), velocity=(0, 0.3))
+    landed = np.zeros(len(x), dtype=bool)
+    for _ in range(10):
+        lander.step(NOOP)
+        codes, line = lander.check_collision()
+        landed |= (codes == LANDED) & ~lander.landed
+        lander.landed |= codes != NONE
+    if not landed.any() or landed.all():
+        return x[landed]
+
+    # Start from a column that is not a spot, so no run is split by the tile edge
+    shift = int(np.argmin(landed))
+    edges = np.diff(np.concatenate([[0], np.roll(landed, -shift).astype(np.int8), [0]]))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return np.sort(((starts + ends) / 2 + shift) * heights.resolution % heights.tileWidth)
+
+
+class Autopilot:
+    # Chooses NOOP, ROTATE_LEFT, ROTATE_RIGHT or THRUST for a lander with one table lookup.
+    # action() serves an engine.Lander; calling the autopilot serves a batch.BatchLander, and matches the
+    # rollout policy signature. The table is planned for one decision every `frames` frames, so callers should
+    # hold each action that long: Engine.step(action, frames), rollout with frames=..., or hold() when stepping
+    # frame by frame
+    def __init__(self, landscape=None, gravity=0.02, thrust_power=0.04, frames=8, rotation_delay=150, grid=None,
+                 cache_dir=CACHE_DIR, rebuild=False, progress=None):
+        landscape = landscape if landscape is not None else Landscape()
+        self.grid = grid if grid is not None else Grid()
+        self.frames = frames
+        self.table = load_table(self.grid, gravity, thrust_power, frames, rotation_delay, cache_dir, rebuild,
+                                progress)
+        # The action hold() repeats and how many more frames it repeats it for
+        self.held = NOOP
+        self.remaining = 0
+        self.flat = self.table.reshape(-1)
+        self.actions = np.array(ACTIONS, dtype=np.int64)
+        self.heightmap = landscape.heightMap()
+        self.heights = HeightMapArrays(self.heightmap)
+
+        # Spots repeated a tile to either side, so the nearest one to any x in the tile is a plain search
+        width = self.heightmap.tileWidth
+        spots = landing_spots(landscape, self.heights)
+        self.spots = np.concatenate([spots - width, spots, spots + width])
+        self.spot_list = self.spots.tolist()
+
+    def action(self, lander):
+        x, y = lander.position
+        size = lander.size
+        # The box is as high as the highest ground under any part of it
+        height = min(self.heightmap.clearance(x + dx, y, size) for dx in (-size, 0, size))
+        offset = 0.0
+        if self.spot_list:
+            x %= self.heightmap.tileWidth
+            j = bisect.bisect_left(self.spot_list, x)
+            offset = min(self.spot_list[j - 1] - x, self.spot_list[j] - x, key=abs)
+        index = self.grid.scalar_index(lander.target_angle, lander.fuel, height, lander.velocity[1],
+                                       lander.velocity[0], offset)
+        return ACTIONS[self.flat[index]]
+
+    def hold(self, lander):
+        # action() for a caller stepping one frame at a time, decided afresh only every `frames` calls
+        if self.remaining <= 0:
+            self.held = self.action(lander)
+            self.remaining = self.frames
+        self.remaining -= 1
+        return self.held
+
+    def release(self):
+        # The next hold() decides at once, e.g. after the lander was reset
+        self.remaining = 0
+
+    def __call__(self, lander, rng=None):
+        x, y = lander.position[:, 0], lander.position[:, 1]
+        size = lander.size
+        height = np.minimum.reduce([self.heights.clearance(x + dx, y, size) for dx in (-size, 0, size)])
+        offset = np.zeros(lander.n)
+        if len(self.spots):
+            x = x % self.heightmap.tileWidth
+            j = np.searchsorted(self.spots, x)
+            before, after = self.spots[j - 1] - x, self.spots[j] - x
+            offset = np.where(np.abs(before) < np.abs(after), before, after)
+        index = self.grid.index(lander.target_angle, lander.fuel, height, lander.velocity[:, 1], lander.velocity[:, 0],
+                                offset)
+        return self.actions[self.flat[index]]
+
+    def __getstate__(self):
+        # Rollout workers map the cached file themselves rather than receiving a copy of the table
+        state = self.__dict__.copy()
+        del state['table'], state['flat']
+        state['path'] = self.table.filename
+        return state
+
+    def __setstate__(self, state):
+        self.table = np.load(state.pop('path'), mmap_mode='r')
+        self.flat = self.table.reshape(-1)
+        self.__dict__.update(state)
+
+
+def main(argv=None):
+    import rollout
+
+    parser = argparse.ArgumentParser(description="Plan (or load) the autopilot table and fly it over random starts.")
+    parser.add_argument("--build", action="store_true", help="only plan the table into the cache, then exit")
+    parser.add_argument("--episodes", type=int, default=2000)
+    parser.add_argument("--rebuild", action="store_true", help="plan again even if a cached table exists")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    landscape = Landscape()
+    began = time.perf_counter()
+    autopilot = Autopilot(landscape, rebuild=args.rebuild, progress=print_progress)
+    print(f"table {autopilot.table.shape} ready in {time.perf_counter() - began:.1f}s: {autopilot.table.filename}")
+    if args.build:
+        return
+
+    rng = np.random.default_rng(args.seed)
+    n = args.episodes
+    starts = np.column_stack([rng.uniform(0, landscape.width, n), np.full(n, 50.0),
+                              rng.uniform(-1, 1, n), rng.uniform(0, 0.5, n)])
+    for name, policy, frames in (("descent_policy", rollout.descent_policy, 1), ("autopilot", autopilot, autopilot.frames)):
+        results = rollout.run(starts, policy=policy, landscape=landscape, workers=args.workers, seed=args.seed,
+                              frames=frames)
+        counts = np.bincount(results['result'], minlength=3)
+        print(f"{name}: {counts[1]} landed, {counts[2]} crashed, {counts[0]} timed out, "
+              f"mean score {results['score'].mean():.1f}")
+
+
+if __name__ == "__main__":
+    main()
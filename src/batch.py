@@ -0,0 +1,337 @@
+import numpy as np
+from engine import FPS, ROTATE_LEFT, ROTATE_RIGHT, THRUST
+
+# Collision codes returned by the batched checks
+NONE = 0
+LANDED = 1
+CRASHED = 2
+RESULTS = (None, 'landed', 'crashed')
+
+
+class SegmentArrays:
+    # Zero-copy NumPy views of the Landscape segment arrays plus the bucket grid padded to a fixed width
+    ARRAYS = ('x1', 'y1', 'x2', 'y2', 'landable', 'multiplier', 'buckets')
+    SCALARS = ('tileWidth', 'bucketWidth', 'width', 'height')
+
+    def __init__(self, landscape):
+        self.x1 = np.frombuffer(landscape.x1, dtype=np.float32)
+        self.y1 = np.frombuffer(landscape.y1, dtype=np.float32)
+        self.x2 = np.frombuffer(landscape.x2, dtype=np.float32)
+        self.y2 = np.frombuffer(landscape.y2, dtype=np.float32)
+        self.landable = np.frombuffer(landscape.landable, dtype=bool)
+        self.multiplier = np.frombuffer(landscape.multiplier, dtype=np.int32)
+        self.tileWidth = landscape.tileWidth
+        self.bucketWidth = landscape.bucketWidth
+        self.width = landscape.width
+        self.height = landscape.height
+
+        width = max(len(bucket) for bucket in landscape.buckets)
+        # -1 pads short buckets; it is masked out before any lookup
+        self.buckets = np.full((len(landscape.buckets), width), -1, dtype=np.int64)
+        for b, bucket in enumerate(landscape.buckets):
+            self.buckets[b, :len(bucket)] = bucket
+
+    @classmethod
+    def from_arrays(cls, arrays, scalars):
+        # Wrap existing buffers (e.g. shared memory views) without copying them
+        segments = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(segments, name, arrays[name])
+        for name in cls.SCALARS:
+            setattr(segments, name, scalars[name])
+        return segments
+
+    def candidates(self, left, right):
+        # Lines of every bucket each [left, right] range spans, -1 padded; a line can repeat across buckets.
+        # Any bucket width works: a box wider than a bucket just spans more of them
+        last = len(self.buckets) - 1
+        first = np.clip(left // self.bucketWidth, 0, last).astype(np.int64)
+        end = np.clip(right // self.bucketWidth, 0, last).astype(np.int64)
+        span = int((end - first).max(initial=0)) + 1
+        bucket = first[:, None] + np.arange(span)
+        index = self.buckets[np.minimum(bucket, last)]
+        index[bucket > end[:, None]] = -1
+        return index.reshape(len(left), -1)
+
+    def first_hit(self, position, size):
+        # Index of the first line (in Landscape.lines order) touching each box, or -1
+        x = position[:, 0]
+        y = position[:, 1]
+        tile_offset = (x // self.tileWidth) * self.tileWidth
+        left = x - size - tile_offset
+        right = x + size - tile_offset
+        top = (y - size)[:, None]
+        bottom = (y + size)[:, None]
+
+        index = self.candidates(left, right)
+        valid = index >= 0
+        safe = np.where(valid, index, 0)
+        x1 = self.x1[safe].astype(np.float64)
+        y1 = self.y1[safe].astype(np.float64)
+        dx = self.x2[safe] - x1
+        dy = self.y2[safe] - y1
+
+        # Vectorized Liang-Barsky, same test as engine.segment_hits_box
+        t0 = np.zeros(index.shape)
+        t1 = np.ones(index.shape)
+        hit = valid.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for p, q in ((-dx, x1 - left[:, None]), (dx, right[:, None] - x1), (-dy, y1 - top), (dy, bottom - y1)):
+                t = q / p
+                hit &= ~((p == 0) & (q < 0))
+                t0 = np.where(p < 0, np.maximum(t0, t), t0)
+                t1 = np.where(p > 0, np.minimum(t1, t), t1)
+        hit &= t0 <= t1
+
+        first = np.where(hit, index, np.iinfo(np.int64).max).min(axis=1)
+        return np.where(first == np.iinfo(np.int64).max, -1, first)
+
+    def first_sweep(self, start, delta, size):
+        # (line, t) of the first line (earliest t, then Landscape.lines order) each box touches while its centre
+        # moves from start by delta; line is -1 and t is 1 where nothing is touched.
+        # Vectorized engine.segment_sweeps_box, in float64 throughout like the scalar sweep. As in
+        # Landscape.segmentsNear only the tile copy under the middle of the move is swept, so a move straddling the
+        # tile seam misses the lines on the far side of it, exactly as engine.Lander.sweep_contact does
+        x = start[:, 0]
+        y = start[:, 1]
+        dx = delta[:, 0]
+        dy = delta[:, 1]
+        tile_offset = ((x + dx / 2) // self.tileWidth) * self.tileWidth
+        x = x - tile_offset
+        index = self.candidates(np.minimum(x, x + dx) - size, np.maximum(x, x + dx) + size)
+        valid = index >= 0
+        safe = np.where(valid, index, 0)
+        x1 = self.x1[safe].astype(np.float64)
+        y1 = self.y1[safe].astype(np.float64)
+        x2 = self.x2[safe].astype(np.float64)
+        y2 = self.y2[safe].astype(np.float64)
+        sx = x2 - x1
+        sy = y2 - y1
+        x = x[:, None]
+        y = y[:, None]
+        dx = dx[:, None]
+        dy = dy[:, None]
+        reach = size * (np.abs(sx) + np.abs(sy))
+        along = sy * -dx + sx * dy
+        offset = sy * (x1 - x) + sx * (y - y1)
+
+        t0 = np.zeros(index.shape)
+        t1 = np.ones(index.shape)
+        hit = valid.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for p, q in ((-dx, x - np.minimum(x1, x2) + size), (dx, np.maximum(x1, x2) + size - x),
+                         (-dy, y - np.minimum(y1, y2) + size), (dy, np.maximum(y1, y2) + size - y),
+                         (along, reach - offset), (-along, reach + offset)):
+                p = np.broadcast_to(p, index.shape)
+                t = q / p
+                hit &= ~((p == 0) & (q < 0))
+                t0 = np.where(p < 0, np.maximum(t0, t), t0)
+                t1 = np.where(p > 0, np.minimum(t1, t), t1)
+        hit &= t0 <= t1
+
+        time = np.where(hit, t0, np.inf)
+        first = time.min(axis=1)
+        earliest = hit & (time == first[:, None])
+        line = np.where(earliest, index, np.iinfo(np.int64).max).min(axis=1)
+        touched = np.isfinite(first)
+        return np.where(touched, line, -1), np.where(touched, first, 1.0)
+
+
+class HeightMapArrays:
+    # Zero-copy NumPy views of a heightmap.HeightMap, queried for many x at once
+    def __init__(self, heightmap):
+        self.resolution = heightmap.resolution
+        self.tileWidth = heightmap.tileWidth
+        self.columns = heightmap.columns
+        self.ground = np.frombuffer(heightmap.ground, dtype=np.float32)
+        self.slope = np.frombuffer(heightmap.slope, dtype=np.float32)
+        self.zone = np.frombuffer(heightmap.zone, dtype=np.int16)
+        self.multiplier = np.frombuffer(heightmap.multiplier, dtype=np.int32)
+        self.pad_distance = np.frombuffer(heightmap.padDistance, dtype=np.float32)
+
+    def column(self, x):
+        return np.minimum((np.asarray(x) % self.tileWidth / self.resolution).astype(np.int64), self.columns - 1)
+
+    def ground_at(self, x):
+        position = np.asarray(x) % self.tileWidth / self.resolution
+        i = np.minimum(position.astype(np.int64), self.columns - 1)
+        return self.ground[i] + (self.ground[i + 1] - self.ground[i]) * (position - i)
+
+    def clearance(self, x, y, size=0):
+        return self.ground_at(x) - y - size
+
+    def slope_at(self, x):
+        return self.slope[self.column(x)]
+
+    def zone_at(self, x):
+        return self.zone[self.column(x)]
+
+    def multiplier_at(self, x):
+        return self.multiplier[self.column(x)]
+
+    def pad_distance_at(self, x):
+        return self.pad_distance[self.column(x)]
+
+
+def check_collision(segments, position, angle, velocity, size=15):
+    # Batched Lander.check_collision: returns (codes, line indices)
+    line = segments.first_hit(position, size)
+    return contact_codes(segments, line, angle, velocity), line
+
+
+def contact_codes(segments, line, angle, velocity):
+    # LANDED where the touched line is landable and the lander is gentle enough, CRASHED on other contacts
+    touching = line >= 0
+    safe = np.where(touching, line, 0)
+    soft = ((segments.landable[safe]) & (np.abs(angle) <= 5)
+            & (np.abs(velocity[:, 0]) <= 0.5) & (np.abs(velocity[:, 1]) <= 0.5))
+    return np.where(touching, np.where(soft, LANDED, CRASHED), NONE)
+
+
+class BatchLander:
+    # N landers in flat arrays, stepped together with the same rules as engine.Lander
+    def __init__(self, n, landscape, gravity=0.02, thrust_power=0.04, initial_fuel=1000, segments=None):
+        # landscape may be None when prebuilt segments are given
+        self.n = n
+        self.landscape = landscape
+        self.segments = segments if segments is not None else SegmentArrays(landscape)
+        self.size = 15
+        self.gravity = gravity
+        self.thrust_power = thrust_power
+        self.initial_fuel = initial_fuel
+        self.rotation_delay = 150
+        self.rotation_speed = 1.75
+
+        self.position = np.zeros((n, 2))
+        self.velocity = np.zeros((n, 2))
+        self.angle = np.zeros(n)
+        self.target_angle = np.zeros(n)
+        self.fuel = np.zeros(n, dtype=np.int64)
+        self.last_rotation_time = np.zeros(n, dtype=np.int64)
+        # Step each lander was last reset at; rotation is gated on ticks since then, as if each had its own clock
+        self.start_step = np.zeros(n, dtype=np.int64)
+        self.landed = np.zeros(n, dtype=bool)
+        self.score_added = np.zeros(n, dtype=bool)
+        self.score = np.zeros(n)
+        self.steps = 0
+        # State at the start of a multi-frame step and the move since, for the swept collision check
+        self.frames = 1
+        self.start_position = np.zeros((n, 2))
+        self.start_velocity = np.zeros((n, 2))
+        self.start_angle = np.zeros(n)
+        self.moved = np.zeros((n, 2))
+        # Frames into the last step at which each lander touched a line, NaN where none did
+        self.impact = np.full(n, np.nan)
+
+    def ticks(self):
+        # Per-lander simulated milliseconds since its reset, the engine.SimClock.ticks() of a lone lander
+        return (self.steps - self.start_step) * 1000 // FPS
+
+    def reset(self, position, mask=None, velocity=0):
+        # position/velocity are (N, 2) or (2,); mask restricts the reset to some landers
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.position[mask] = np.broadcast_to(position, self.position.shape)[mask]
+        self.velocity[mask] = np.broadcast_to(velocity, self.velocity.shape)[mask]
+        self.angle[mask] = 0
+        self.target_angle[mask] = 0
+        self.fuel[mask] = self.initial_fuel
+        self.last_rotation_time[mask] = 0
+        self.landed[mask] = False
+        self.score_added[mask] = False
+        self.score[mask] = 0
+        if mask.all():
+            self.steps = 0
+        self.start_step[mask] = self.steps
+
+    def update_rotation(self):
+        delta = np.clip(self.target_angle - self.angle, -self.rotation_speed, self.rotation_speed)
+        self.angle += delta
+
+    def rotate(self, actions):
+        now = self.ticks()
+        ready = now - self.last_rotation_time >= self.rotation_delay
+        left = ready & ((actions & ROTATE_LEFT) != 0)
+        self.target_angle[left] = np.maximum(-90, self.target_angle[left] - 15)
+        self.last_rotation_time[left] = now[left]
+        # A left press consumes the delay before right is looked at, as in the sequential code
+        right = ready & ~left & ((actions & ROTATE_RIGHT) != 0)
+        self.target_angle[right] = np.minimum(90, self.target_angle[right] + 15)
+        self.last_rotation_time[right] = now[right]
+
+    def apply_thrust(self, actions):
+        firing = ((actions & THRUST) != 0) & (self.fuel > 0)
+        radians = np.radians(self.angle[firing])
+        self.velocity[firing, 0] += np.sin(radians) * self.thrust_power
+        self.velocity[firing, 1] -= np.cos(radians) * self.thrust_power
+        self.fuel[firing] -= 1
+
+    def update_position(self):
+        flying = ~self.landed
+        self.velocity[flying, 1] += self.gravity
+        self.position[flying] += self.velocity[flying]
+        self.position[:, 0] %= self.segments.width
+        np.clip(self.position[:, 1], 0, self.segments.height, out=self.position[:, 1])
+
+    def step(self, actions, frames=1):
+        # frames > 1 repeats the actions for that many frames, like engine.Engine.step; check_collision then
+        # sweeps each box along its whole move
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int64), (self.n,))
+        self.frames = frames
+        if frames > 1:
+            np.copyto(self.start_position, self.position)
+            np.copyto(self.start_velocity, self.velocity)
+            np.copyto(self.start_angle, self.angle)
+            self.moved.fill(0)
+        for _ in range(frames):
+            self.rotate(actions)
+            self.apply_thrust(actions)
+            self.update_position()
+            self.update_rotation()
+            self.steps += 1
+            if frames > 1:
+                # The move as it was before update_position wrapped x and clamped y
+                flying = ~self.landed
+                self.moved[flying] += self.velocity[flying]
+
+    def check_collision(self):
+        if self.frames > 1:
+            return self.sweep_collision()
+        codes, line = check_collision(self.segments, self.position, self.angle, self.velocity, self.size)
+        self.impact = np.where(line >= 0, 1.0, np.nan)
+        return codes, line
+
+    def sweep_collision(self):
+        # Batched engine.Lander.sweep_contact: landers whose box touched a line during the step are put back at
+        # the moment of impact, with velocity and angle interpolated to it, before their codes are worked out.
+        # Landers that were already landed did not move; their box still rests on the pad at t = 0, so they are
+        # reported again just as the per-frame check and the scalar engine report them
+        line, t = self.segments.first_sweep(self.start_position, self.moved, self.size)
+        hit = line >= 0
+        t = t[hit]
+        self.position[hit] = self.start_position[hit] + t[:, None] * self.moved[hit]
+        self.position[hit, 0] %= self.segments.width
+        self.velocity[hit] = self.start_velocity[hit] + t[:, None] * (self.velocity[hit] - self.start_velocity[hit])
+        self.angle[hit] = self.start_angle[hit] + t * (self.angle[hit] - self.start_angle[hit])
+        self.impact.fill(np.nan)
+        self.impact[hit] = t * self.frames
+        return contact_codes(self.segments, line, self.angle, self.velocity), line
+
+    def handle_landing(self, codes, line, multiplier=None, ground=None):
+        # Batched Lander.handle_landing for the landers that just touched down.
+        # multiplier and ground are optional (N,) overrides of the landed line's multiplier and height, e.g. for pads
+        new = (codes == LANDED) & ~self.landed
+        self.velocity[new] = 0
+        self.landed[new] = True
+        scoring = new & ~self.score_added
+        multiplier = self.segments.multiplier[line[scoring]] if multiplier is None else multiplier[scoring]
+        ground = self.segments.y1[line[scoring]] if ground is None else ground[scoring]
+        self.score[scoring] += 100 * multiplier
+        self.fuel[scoring] = np.minimum(self.fuel[scoring] + (100 + 100 * multiplier).astype(np.int64), 1000)
+        self.score_added[scoring] = True
+        self.position[scoring, 1] = ground - self.size
+
+    def collide(self):
+        codes, line = self.check_collision()
+        self.handle_landing(codes, line)
+        return codes
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# Rendering benchmarks never open a real window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# Keep pygame's import banner out of the JSON on stdout
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import engine
+from landscape import Landscape
+
+WINDOW_SIZES = ((800, 600), (1400, 900), (1920, 1080))
+LANDSCALES = (1.0, 1.5, 2.0)
+
+
+def measure(fn, count, repeat):
+    # Best of repeat runs of count calls; the minimum is the least noisy estimate
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn(count)
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+def record(name, params, count, seconds):
+    return {
+        "name": name,
+        "params": params,
+        "count": count,
+        "seconds": seconds,
+        "per_second": count / seconds if seconds else None,
+        "mean_us": seconds / count * 1e6,
+    }
+
+
+def bench_physics(seed, count, repeat):
+    landscape = Landscape()
+    rng = random.Random(seed)
+    lander = engine.Lander([landscape.width / 2, 50], initial_fuel=count * repeat + 1)
+
+    def update_position(n):
+        for _ in range(n):
+            lander.update_position(landscape)
+
+    def update_rotation(n):
+        for _ in range(n):
+            lander.target_angle = 90 if lander.angle < 0 else -90
+            lander.update_rotation()
+
+    def apply_thrust(n):
+        for _ in range(n):
+            lander.apply_thrust()
+
+    actions = [rng.randrange(8) for _ in range(count)]
+
+    def full_step(n):
+        sim = engine.Engine(landscape, seed=seed)
+        for action in actions[:n]:
+            if sim.done:
+                sim.reset()
+            sim.step(action)
+
+    results = []
+    for name, fn in (("update_position", update_position), ("update_rotation", update_rotation),
+                     ("apply_thrust", apply_thrust), ("engine_step", full_step)):
+        results.append(record(f"physics.{name}", {}, count, measure(fn, count, repeat)))
+    return results
+
+
+def bench_collision(seed, count, repeat):
+    landscape = Landscape()
+    rng = random.Random(seed)
+    # Spread probes over the whole tile and from the sky down to the ground
+    probes = [engine.Lander([rng.uniform(0, landscape.width), rng.uniform(0, landscape.height)]) for _ in range(count)]
+
+    def check(n):
+        for lander in probes[:n]:
+            lander.check_collision(landscape)
+
+    results = [record("collision.check_collision", {"probes": count}, count, measure(check, count, repeat))]
+
+    # One 8-frame move per probe at up to 4 px per frame; positions are put back after each pass
+    moves = [(rng.uniform(-32, 32), rng.uniform(-32, 32)) for _ in range(count)]
+    starts = [(lander.position[0], lander.position[1], 0.0, 0.0, 0.0) for lander in probes]
+
+    def sweep(n):
+        for lander, start, (dx, dy) in zip(probes[:n], starts, moves):
+            lander.sweep_contact(landscape, start, dx, dy)
+            lander.position[0], lander.position[1] = start[0], start[1]
+
+    results.append(record("collision.sweep_contact", {"probes": count, "frames": 8}, count, measure(sweep, count, repeat)))
+
+    try:
+        import numpy as np
+        import batch
+    except ImportError:
+        return results
+    segments = batch.SegmentArrays(landscape)
+    position = np.array([lander.position for lander in probes])
+    angle = np.zeros(count)
+    velocity = np.zeros((count, 2))
+
+    def check_batch(n):
+        batch.check_collision(segments, position, angle, velocity)
+
+    results.append(record("collision.batch_check_collision", {"probes": count}, count, measure(check_batch, count, repeat)))
+    return results
+
+
+def bench_batch(seed, landers, frames, repeat):
+    try:
+        import numpy as np
+        import batch
+    except ImportError:
+        return []
+    landscape = Landscape()
+    rng = np.random.default_rng(seed)
+    # Same random actions and start height as physics.engine_step; finished landers start again where they began
+    actions = rng.integers(0, 8, (frames, landers))
+    starts = np.column_stack([rng.uniform(0, landscape.width, landers), np.full(landers, 50.0)])
+    fleet = batch.BatchLander(landers, landscape)
+
+    def step(n):
+        fleet.reset(starts)
+        for frame in actions[:n]:
+            fleet.step(frame)
+            done = fleet.collide() != batch.NONE
+            if done.any():
+                fleet.reset(starts, mask=done)
+
+    # The scalar engine on a slice of the same actions, so the speedup is measured on this machine
+    scalar_actions = actions[:, :max(1, min(landers, 100))].ravel().tolist()
+
+    def scalar_step(n):
+        sim = engine.Engine(landscape, seed=seed)
+        for action in scalar_actions[:n]:
+            if sim.done:
+                sim.reset()
+            sim.step(action)
+
+    scalar = record("batch.scalar_engine_step", {}, len(scalar_actions),
+                    measure(scalar_step, len(scalar_actions), repeat))
+    # count is lander-steps, so per_second compares directly with the scalar engine's steps per second
+    result = record("batch.step", {"landers": landers, "frames": frames}, landers * frames,
+                    measure(step, frames, repeat))
+    result["speedup"] = result["per_second"] / scalar["per_second"]
+    return [scalar, result]
+
+
+def bench_render(seed, frames, repeat):
+    import pygame
+
+    pygame.display.init()
+    results = []
+    for landscale in LANDSCALES:
+        random.seed(seed)
+        landscape = Landscape(landscale)
+        # Rasterizing the cached tile is a one-off cost, reported apart from the steady state
+        results.append(record("render.build_tile", {"landscale": landscale}, 1,
+                              measure(lambda n: landscape.buildTileSurface(), 1, repeat)))
+        for width, height in WINDOW_SIZES:
+            surface = pygame.Surface((width, height))
+            camera = pygame.Rect(0, 0, width, height)
+
+            def frame(n):
+                for i in range(n):
+                    camera.left = int(i * 7 % landscape.width)
+                    surface.fill((0, 0, 0))
+                    landscape.render(surface, camera)
+
+            params = {"width": width, "height": height, "landscale": landscale}
+            results.append(record("render.landscape", params, frames, measure(frame, frames, repeat)))
+    pygame.display.quit()
+    return results
+
+
+SUITES = {
+    "physics": lambda args: bench_physics(args.seed, args.steps, args.repeat),
+    "collision": lambda args: bench_collision(args.seed, args.probes, args.repeat),
+    "batch": lambda args: bench_batch(args.seed, args.landers, args.frames, args.repeat),
+    "render": lambda args: bench_render(args.seed, args.frames, args.repeat),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the physics, collision, batch and rendering hot paths.")
+    parser.add_argument("suites", nargs="*", help=f"any of {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=100000)
+    parser.add_argument("--probes", type=int, default=20000)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--landers", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    random.seed(args.seed)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": [],
+    }
+    for suite in args.suites or list(SUITES):
+        report["results"].extend(SUITES[suite](args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+import pygame
+
+
+class FrameCapture:
+    # Copies rendered frames into a fixed pool of NumPy buffers and hands them to a writer thread.
+    # capture() never waits: when every buffer is still queued for writing, the frame is dropped and counted.
+    # A PNG capture follows window resizes with a new pool; a raw stream has one frame size and drops the rest
+    def __init__(self, path, size, mode='png', buffers=16):
+        self.path = path
+        self.mode = mode
+        self.count = buffers
+        self.allocate(size)
+        self.pending = queue.Queue()
+        self.frames = 0
+        self.dropped = 0
+        self.warned = False
+
+        if mode == 'png':
+            os.makedirs(path, exist_ok=True)
+            self.raw = None
+        elif mode == 'raw':
+            # Plain rgb24 frames back to back, e.g. ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r FPS -i path
+            self.raw = open(path, 'wb')
+        else:
+            raise ValueError(f"unknown capture mode {mode!r}")
+        self.writer = threading.Thread(target=self.write_frames, name='frame-writer', daemon=True)
+        self.writer.start()
+
+    def allocate(self, size):
+        # A pool for frames of this size. Frames still queued from an older pool carry their own buffer and free
+        # queue, so they are written as usual and the old pool goes away with them
+        self.size = tuple(size)
+        # surfarray works in (width, height, 3) order
+        self.buffers = np.zeros((self.count, self.size[0], self.size[1], 3), dtype=np.uint8)
+        self.free = queue.Queue()
+        for buffer in self.buffers:
+            self.free.put(buffer)
+
+    def capture(self, surface):
+        if surface.get_size() != self.size:
+            if self.raw is not None:
+                if not self.warned:
+                    self.warned = True
+                    print(f"capture: the window is no longer {self.size[0]}x{self.size[1]}; the raw stream drops "
+                          f"frames until it is again", file=sys.stderr)
+                self.dropped += 1
+                return False
+            self.allocate(surface.get_size())
+        free = self.free
+        try:
+            buffer = free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        # pixels3d is a view of the surface memory; the only copy is into the preallocated buffer
+        pixels = pygame.surfarray.pixels3d(surface)
+        np.copyto(buffer, pixels)
+        del pixels
+        self.pending.put((buffer, free, self.frames))
+        self.frames += 1
+        return True
+
+    def write_frames(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            image, free, frame = item
+            if self.raw is not None:
+                self.raw.write(np.ascontiguousarray(image.transpose(1, 0, 2)).tobytes())
+            else:
+                pygame.image.save(pygame.surfarray.make_surface(image), os.path.join(self.path, f"frame_{frame:06d}.png"))
+            free.put(image)
+
+    def close(self):
+        # Waits for the queued frames to be written
+        self.pending.put(None)
+        self.writer.join()
+        if self.raw is not None:
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,446 @@
+import math
+import random
+import struct
+from landscape import Landscape, LandscapeLine
+
+# Action bits, combinable like the arrow keys in the game loop
+NOOP = 0
+ROTATE_LEFT = 1
+ROTATE_RIGHT = 2
+THRUST = 4
+
+FPS = 120
+
+# Flat snapshot layouts: the lander's fields, then the engine's clock, episode, result, landscape zone state and
+# impact (NaN for None), then its reset RNG: version, state words and pending gauss value
+LANDER_STATE = struct.Struct('<6dqq??q')
+ENGINE_STATE = struct.Struct('<qdqbqdd')
+RANDOM_STATE = struct.Struct('<i625I?d')
+RESULT_CODES = {None: 0, 'landed': 1, 'crashed': 2}
+RESULTS = (None, 'landed', 'crashed')
+
+
+def segment_hits_box(left, top, right, bottom, x1, y1, x2, y2):
+    # Liang-Barsky clip of the segment against the closed float box [left, right] x [top, bottom]; touching an edge
+    # counts. Unlike pygame.Rect.clipline the box is not truncated to integers and its right/bottom edges are inclusive
+    dx = x2 - x1
+    dy = y2 - y1
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x1 - left), (dx, right - x1), (-dy, y1 - top), (dy, bottom - y1)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return False
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return False
+                t1 = min(t1, t)
+    return True
+
+
+def segment_sweeps_box(x, y, dx, dy, size, x1, y1, x2, y2):
+    # Earliest t in [0, 1] at which the box of half-size `size` centred on (x + t*dx, y + t*dy) touches the
+    # segment, or None. The box touches the segment while its centre is inside their Minkowski sum, a convex
+    # polygon with two axis-aligned pairs of sides and one pair parallel to the segment; the centre's path is
+    # clipped against those six half-planes the same way segment_hits_box clips against four
+    sx = x2 - x1
+    sy = y2 - y1
+    # Segment normal, and how far the box reaches along it
+    nx, ny = -sy, sx
+    reach = size * (abs(sx) + abs(sy))
+    along = nx * dx + ny * dy
+    offset = nx * (x - x1) + ny * (y - y1)
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x - min(x1, x2) + size), (dx, max(x1, x2) + size - x),
+                 (-dy, y - min(y1, y2) + size), (dy, max(y1, y2) + size - y),
+                 (along, reach - offset), (-along, reach + offset)):
+        if p == 0:
+            if q < 0:
+                return None
+        else:
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return None
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return None
+                t1 = min(t1, t)
+    return t0
+
+
+# cos/sin of 120 degrees, for turning the lander's heading into its triangle corners
+COS_120 = -0.5
+SIN_120 = math.sqrt(3) / 2
+
+
+class Lander:
+    # All per-lander state lives in fixed slots and is updated in place; sin/cos follow the angle
+    __slots__ = ('position', '_angle', 'sin', 'cos', 'target_angle', 'velocity', 'size', 'gravity', 'thrust_power',
+                 'fuel', 'initial_fuel', 'last_rotation_time', 'rotation_delay', 'rotation_speed', 'landed',
+                 'score_added', 'score', 'clock', 'box')
+
+    def __init__(self, position, angle=0, gravity=0.02, thrust_power=0.04, initial_fuel=1000, init_landed=False, init_score_added=False, clock=None):
+        self.position = position
+        self.angle = angle
+        self.target_angle = angle
+        self.velocity = [0, 0]
+        self.size = 15
+        self.gravity = gravity
+        self.thrust_power = thrust_power
+        self.fuel = initial_fuel
+        self.initial_fuel = initial_fuel
+        self.last_rotation_time = 0
+        self.rotation_delay = 150
+        self.rotation_speed = 1.75
+        self.landed = init_landed
+        self.score_added = init_score_added
+        self.score = 0
+        # Callable returning the current time in milliseconds, used to gate rotation
+        self.clock = clock if clock is not None else (lambda: 0)
+        # Corners of the collision triangle in world coordinates, filled by update_box
+        self.box = [[0.0, 0.0], [0.0, 0.0], [0.0, 0.0]]
+
+    @property
+    def angle(self):
+        return self._angle
+
+    @angle.setter
+    def angle(self, value):
+        # The only place trig runs: once whenever the angle actually changes
+        self._angle = value
+        radians = math.radians(value)
+        self.sin = math.sin(radians)
+        self.cos = math.cos(radians)
+
+    def reset(self, position, angle=0):
+        # Back to a fresh lander at position without allocating a new one; the score is kept
+        self.position[0] = position[0]
+        self.position[1] = position[1]
+        self.angle = angle
+        self.target_angle = angle
+        self.velocity[0] = 0
+        self.velocity[1] = 0
+        self.fuel = self.initial_fuel
+        self.last_rotation_time = 0
+        self.landed = False
+        self.score_added = False
+
+    def snapshot(self, buffer=None, offset=0):
+        # Every mutable field as LANDER_STATE bytes, or packed into buffer at offset to avoid allocating
+        values = (self.position[0], self.position[1], self.velocity[0], self.velocity[1], self._angle,
+                  self.target_angle, self.fuel, self.last_rotation_time, self.landed, self.score_added, self.score)
+        if buffer is None:
+            return LANDER_STATE.pack(*values)
+        LANDER_STATE.pack_into(buffer, offset, *values)
+        return buffer
+
+    def restore(self, buffer, offset=0):
+        (self.position[0], self.position[1], self.velocity[0], self.velocity[1], angle, self.target_angle,
+         self.fuel, self.last_rotation_time, self.landed, self.score_added, self.score) = LANDER_STATE.unpack_from(buffer, offset)
+        if angle != self._angle:
+            self.angle = angle
+
+    def update_box(self):
+        # Same triangle as the game draws, computed from the cached sin/cos
+        x, y = self.position
+        size = self.size
+        sin, cos = self.sin, self.cos
+        box = self.box
+        box[0][0] = x + size * sin
+        box[0][1] = y - size * cos
+        box[1][0] = x - size * (sin * COS_120 + cos * SIN_120)
+        box[1][1] = y + size * (cos * COS_120 - sin * SIN_120)
+        box[2][0] = x - size * (sin * COS_120 - cos * SIN_120)
+        box[2][1] = y + size * (cos * COS_120 + sin * SIN_120)
+        return box
+
+    def rotate_left(self):
+        current_time = self.clock()
+        if current_time - self.last_rotation_time >= self.rotation_delay:
+            self.target_angle = max(-90, self.target_angle - 15)
+            self.last_rotation_time = current_time
+
+    def rotate_right(self):
+        current_time = self.clock()
+        if current_time - self.last_rotation_time >= self.rotation_delay:
+            self.target_angle = min(90, self.target_angle + 15)
+            self.last_rotation_time = current_time
+
+    def update_rotation(self):
+        if self.angle != self.target_angle:
+            if self.angle < self.target_angle:
+                self.angle = min(self.angle + self.rotation_speed, self.target_angle)
+            else:
+                self.angle = max(self.angle - self.rotation_speed, self.target_angle)
+
+    def apply_thrust(self):
+        if self.fuel > 0:
+            self.velocity[0] += self.sin * self.thrust_power
+            self.velocity[1] -= self.cos * self.thrust_power
+            self.fuel -= 1
+
+    def update_position(self, landscape):
+        if self.landed:
+            # Skip position and velocity updates if landed to prevent bobbing or phasing through.
+            return
+        self.velocity[1] += self.gravity
+        self.position[0] += self.velocity[0]
+        self.position[1] += self.velocity[1]
+        self.position[0] = self.position[0] % landscape.width
+        self.position[1] = max(0, min(self.position[1], landscape.height))
+
+    def find_contact(self, landscape):
+        # Returns (result, line) for the first segment touching the lander box, or (None, None)
+        left = self.position[0] - self.size
+        top = self.position[1] - self.size
+        right = self.position[0] + self.size
+        bottom = self.position[1] + self.size
+
+        # Reads the terrain arrays directly; a LandscapeLine view is only made for the line that was hit
+        for tile, tile_offset, indices in landscape.segmentsNear(left, right):
+            x1, y1, x2, y2 = tile.x1, tile.y1, tile.x2, tile.y2
+            for i in indices:
+                if segment_hits_box(left, top, right, bottom, x1[i] + tile_offset, y1[i], x2[i] + tile_offset, y2[i]):
+                    if tile.landable[i] and self.gentle():
+                        return 'landed', tile.lines[i]
+                    else:
+                        return 'crashed', tile.lines[i]
+
+        return None, None
+
+    def gentle(self):
+        return -5 <= self._angle <= 5 and abs(self.velocity[0]) <= 0.5 and abs(self.velocity[1]) <= 0.5
+
+    def sweep_contact(self, landscape, start, dx, dy):
+        # Swept find_contact for a step that began at start = (x, y, vx, vy, angle) and moved the lander by
+        # (dx, dy) before any wrapping or clamping: the box is moved along that straight path, and on the first
+        # segment it touches the lander is put back at the moment of impact, with velocity and angle
+        # interpolated to it. Returns (result, line, t) with t the fraction of the step at impact, or (None, None, None).
+        # Like find_contact it sees one tile copy, the one landscape.segmentsNear picks for the middle of the move,
+        # so lines past the tile seam are missed by a move that straddles it
+        x, y, vx, vy, angle = start
+        size = self.size
+        first, hit = None, None
+        for tile, tile_offset, indices in landscape.segmentsNear(min(x, x + dx) - size, max(x, x + dx) + size):
+            x1, y1, x2, y2 = tile.x1, tile.y1, tile.x2, tile.y2
+            for i in indices:
+                t = segment_sweeps_box(x, y, dx, dy, size, x1[i] + tile_offset, y1[i], x2[i] + tile_offset, y2[i])
+                if t is not None and (first is None or t < first):
+                    first, hit = t, (tile, i)
+        if hit is None:
+            return None, None, None
+
+        t = first
+        self.position[0] = (x + t * dx) % landscape.width
+        self.position[1] = y + t * dy
+        self.velocity[0] = vx + t * (self.velocity[0] - vx)
+        self.velocity[1] = vy + t * (self.velocity[1] - vy)
+        self.angle = angle + t * (self._angle - angle)
+        tile, i = hit
+        return ('landed' if tile.landable[i] and self.gentle() else 'crashed'), tile.lines[i], t
+
+    def check_collision(self, landscape):
+        return self.find_contact(landscape)[0]
+
+    def update_score(self, points):
+        self.score += points
+
+    def handle_landing(self, obj):
+        if self.landed:
+            return None
+        self.velocity[0] = 0
+        self.velocity[1] = 0
+        self.landed = True
+        if not self.score_added:
+            multiplier = obj.multiplier if hasattr(obj, 'multiplier') else obj.bonus_multiplier
+            self.update_score(100 * multiplier)
+            self.fuel += 100 + (100 * multiplier)
+            self.fuel = min(self.fuel, 1000)
+            self.score_added = True
+            if isinstance(obj, LandscapeLine):
+                self.position[1] = obj.p1.y - self.size
+            elif hasattr(obj, 'rect'):
+                self.position[1] = obj.rect.top - self.size
+        return 'landed'
+
+    def reset_position(self, width):
+        self.position[0] = random.randint(0, width)
+        self.position[1] = -self.size  # Start above the visible area
+        self.velocity[0] = 0
+        self.velocity[1] = 0
+        self.landed = False
+        self.score_added = False  # Reset score flag for next landing or crash
+
+
+class SimClock:
+    # Fixed-timestep accumulator: real elapsed time goes in, whole simulation steps come out
+    def __init__(self, fps=FPS, max_steps=8):
+        self.fps = fps
+        self.step_ms = 1000 / fps
+        self.max_steps = max_steps
+        self.steps = 0
+        self.accumulator = 0.0
+
+    def ticks(self):
+        # Simulated milliseconds, stands in for pygame.time.get_ticks()
+        return self.steps * 1000 // self.fps
+
+    def tick(self):
+        self.steps += 1
+
+    def reset(self):
+        self.steps = 0
+        self.accumulator = 0.0
+
+    def advance(self, elapsed_ms):
+        # Number of steps owed for elapsed_ms; past max_steps the backlog is dropped rather than replayed
+        self.accumulator += elapsed_ms
+        count = int(self.accumulator // self.step_ms)
+        if count > self.max_steps:
+            count = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= count * self.step_ms
+        return count
+
+    @property
+    def alpha(self):
+        # Fraction of a step left in the accumulator, for interpolating between physics states
+        return self.accumulator / self.step_ms
+
+
+class Engine:
+    # Headless simulation: one lander over one landscape, stepped without pygame.
+    def __init__(self, landscape=None, start=None, initial_fuel=1000, seed=None, recorder=None):
+        self.landscape = landscape if landscape is not None else Landscape()
+        self.start = start
+        self.initial_fuel = initial_fuel
+        self.random = random.Random(seed)
+        # The RNG only moves in reset, so its packed state is refreshed there rather than on every snapshot
+        self.pack_random()
+        self.clock = SimClock()
+        # Optional trajectory.TrajectoryWriter that receives every step
+        self.recorder = recorder
+        self.episode = -1
+        self.result = None
+        self.impact = None
+        self.lander = None
+        self.reset()
+
+    @property
+    def steps(self):
+        return self.clock.steps
+
+    def ticks(self):
+        return self.clock.ticks()
+
+    def reset(self, position=None):
+        if position is None and self.start is not None:
+            position = self.start
+        elif position is None:
+            position = [self.random.uniform(0, self.landscape.width), 50]
+            self.pack_random()
+        self.clock.reset()
+        self.episode += 1
+        self.result = None
+        self.impact = None
+        if self.lander is None:
+            self.lander = Lander(list(position), initial_fuel=self.initial_fuel, clock=self.ticks)
+        else:
+            self.lander.reset(position)
+            self.lander.score = 0
+        return self.state()
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def step(self, action=NOOP, frames=1):
+        # frames > 1 repeats the action for that many physics frames and then checks collisions once, swept
+        # along the whole move, so large steps neither tunnel through thin segments nor overshoot the contact.
+        # impact is the number of frames into the step at which the lander touched down, or None
+        lander = self.lander
+        if frames > 1:
+            start = (lander.position[0], lander.position[1], lander.velocity[0], lander.velocity[1], lander.angle)
+            dx = dy = 0.0
+        for frame in range(frames):
+            if frame:
+                self.clock.tick()
+            if action & ROTATE_LEFT:
+                lander.rotate_left()
+            if action & ROTATE_RIGHT:
+                lander.rotate_right()
+            if action & THRUST:
+                lander.apply_thrust()
+
+            lander.update_position(self.landscape)
+            lander.update_rotation()
+            if frames > 1 and not lander.landed:
+                # The move as it was before update_position wrapped x and clamped y
+                dx += lander.velocity[0]
+                dy += lander.velocity[1]
+
+        if frames > 1:
+            result, line, t = lander.sweep_contact(self.landscape, start, dx, dy)
+            self.impact = None if t is None else t * frames
+        else:
+            result, line = lander.find_contact(self.landscape)
+            self.impact = None if result is None else 1
+        if result == 'landed':
+            lander.handle_landing(line)
+        self.result = result
+        if self.recorder is not None:
+            self.recorder.write_lander(self.episode, self.steps, lander, action, result)
+        self.clock.tick()
+        return self.state(), result
+
+    def pack_random(self):
+        version, words, gauss = self.random.getstate()
+        self.random_state = RANDOM_STATE.pack(version, *words, gauss is not None, 0.0 if gauss is None else gauss)
+
+    def snapshot(self, buffer=None):
+        # Lander state, ENGINE_STATE and RANDOM_STATE; restore() rewinds to exactly this point, so a reset after
+        # it draws the same start as one after the snapshot did
+        landscape = self.landscape
+        values = (self.clock.steps, self.clock.accumulator, self.episode, RESULT_CODES[self.result],
+                  getattr(landscape, 'currentCombi', 0), getattr(landscape, 'flickerProgress', 0),
+                  math.nan if self.impact is None else self.impact)
+        if buffer is None:
+            return self.lander.snapshot() + ENGINE_STATE.pack(*values) + self.random_state
+        self.lander.snapshot(buffer)
+        ENGINE_STATE.pack_into(buffer, LANDER_STATE.size, *values)
+        offset = LANDER_STATE.size + ENGINE_STATE.size
+        buffer[offset:offset + RANDOM_STATE.size] = self.random_state
+        return buffer
+
+    def restore(self, buffer):
+        self.lander.restore(buffer)
+        (steps, accumulator, self.episode, result, combi, flicker,
+         impact) = ENGINE_STATE.unpack_from(buffer, LANDER_STATE.size)
+        self.clock.steps = steps
+        self.clock.accumulator = accumulator
+        self.result = RESULTS[result]
+        self.impact = None if math.isnan(impact) else impact
+        offset = LANDER_STATE.size + ENGINE_STATE.size
+        random_state = bytes(buffer[offset:offset + RANDOM_STATE.size])
+        if random_state != self.random_state:
+            version, *words, has_gauss, gauss = RANDOM_STATE.unpack(random_state)
+            self.random.setstate((version, tuple(words), gauss if has_gauss else None))
+            self.random_state = random_state
+        landscape = self.landscape
+        if getattr(landscape, 'currentCombi', 0) != combi:
+            landscape.setZoneCombi(combi)
+        if hasattr(landscape, 'flickerProgress'):
+            landscape.flickerProgress = flicker
+
+    def state(self):
+        lander = self.lander
+        return (lander.position[0], lander.position[1], lander.velocity[0], lander.velocity[1],
+                lander.angle, lander.target_angle, lander.fuel)
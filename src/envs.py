@@ -0,0 +1,146 @@
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+
+import engine
+from batch import CRASHED, LANDED, NONE, BatchLander, HeightMapArrays
+from landscape import Landscape
+from pixels import PixelRenderer
+
+# Observation columns; altitude is the distance from the lander down to the terrain under it
+OBSERVATION = ('x', 'y', 'vx', 'vy', 'angle', 'fuel', 'altitude')
+
+
+def observation_space(landscape, initial_fuel):
+    low = np.array([0, 0, -np.inf, -np.inf, -90, 0, -np.inf], dtype=np.float32)
+    high = np.array([landscape.width, landscape.height, np.inf, np.inf, 90, max(initial_fuel, 1000), np.inf],
+                    dtype=np.float32)
+    return spaces.Box(low, high, dtype=np.float32)
+
+
+class LanderEnv(gym.Env):
+    # One engine.Engine as a gymnasium.Env; actions are the engine's ROTATE_LEFT/ROTATE_RIGHT/THRUST bits
+    metadata = {'render_modes': []}
+
+    def __init__(self, landscape=None, initial_fuel=1000, max_steps=3000, crash_penalty=100):
+        self.landscape = landscape if landscape is not None else Landscape()
+        self.initial_fuel = initial_fuel
+        self.max_steps = max_steps
+        self.crash_penalty = crash_penalty
+        self.engine = engine.Engine(self.landscape, initial_fuel=initial_fuel)
+        self.action_space = spaces.Discrete(8)
+        self.observation_space = observation_space(self.landscape, initial_fuel)
+
+    def observe(self):
+        lander = self.engine.lander
+        x, y = lander.position
+        return np.array([x, y, lander.velocity[0], lander.velocity[1], lander.angle, lander.fuel,
+                         self.landscape.heightAt(x) - y], dtype=np.float32)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        position = None
+        if options and 'position' in options:
+            position = options['position']
+        elif self.engine.start is None:
+            position = [self.np_random.uniform(0, self.landscape.width), 50]
+        self.engine.reset(position)
+        return self.observe(), {}
+
+    def step(self, action):
+        score = self.engine.lander.score
+        _, result = self.engine.step(int(action))
+        # Landing pays what handle_landing scores, i.e. 100 times the landing zone multiplier
+        reward = float(self.engine.lander.score - score)
+        if result == 'crashed':
+            reward -= self.crash_penalty
+        terminated = result is not None
+        truncated = not terminated and self.engine.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, {'result': result}
+
+
+class LanderVectorEnv(VectorEnv):
+    # num_envs landers in one batch.BatchLander; finished landers are reset on their next step.
+    # With pixels set, observations are pixels.PixelRenderer camera views, e.g. pixels={'size': (84, 84), 'grayscale': True};
+    # the returned array is the renderer's buffer and is overwritten by the next step.
+    metadata = {'render_modes': [], 'autoreset_mode': AutoresetMode.NEXT_STEP}
+
+    def __init__(self, num_envs, landscape=None, initial_fuel=1000, max_steps=3000, crash_penalty=100, pixels=None):
+        self.landscape = landscape if landscape is not None else Landscape()
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.crash_penalty = crash_penalty
+        self.lander = BatchLander(num_envs, self.landscape, initial_fuel=initial_fuel)
+        self.heightmap = HeightMapArrays(self.landscape.heightMap())
+        self.heightmap_combi = self.landscape.currentCombi
+        self.single_action_space = spaces.Discrete(8)
+        self.action_space = spaces.MultiDiscrete(np.full(num_envs, 8))
+        self.renderer = None
+        if pixels is not None:
+            self.renderer = PixelRenderer(self.landscape, num_envs, **pixels)
+            shape = self.renderer.out.shape
+            self.single_observation_space = spaces.Box(0, 255, shape[1:], dtype=np.uint8)
+            self.observation_space = spaces.Box(0, 255, shape, dtype=np.uint8)
+        else:
+            self.single_observation_space = observation_space(self.landscape, initial_fuel)
+            self.observation_space = spaces.Box(
+                np.tile(self.single_observation_space.low, (num_envs, 1)),
+                np.tile(self.single_observation_space.high, (num_envs, 1)), dtype=np.float32)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.needs_reset = np.zeros(num_envs, dtype=bool)
+        self._np_random = np.random.default_rng()
+
+    def observe(self):
+        lander = self.lander
+        if self.renderer is not None:
+            return self.renderer.render(lander.position, lander.angle)
+        x = lander.position[:, 0]
+        altitude = self.heights().clearance(x, lander.position[:, 1])
+        return np.column_stack([lander.position, lander.velocity, lander.angle, lander.fuel, altitude]).astype(np.float32)
+
+    def heights(self):
+        # HeightMapArrays of the current zone combination; Landscape.heightMap rebuilds the map after setZoneCombi
+        if self.heightmap_combi != self.landscape.currentCombi:
+            self.heightmap = HeightMapArrays(self.landscape.heightMap())
+            self.heightmap_combi = self.landscape.currentCombi
+        return self.heightmap
+
+    def reset_envs(self, mask):
+        start = np.column_stack([self.np_random.uniform(0, self.landscape.width, self.num_envs),
+                                 np.full(self.num_envs, 50.0)])
+        self.lander.reset(start, mask)
+        self.episode_steps[mask] = 0
+        self.needs_reset[mask] = False
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._np_random = np.random.default_rng(seed)
+        self.reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observe(), {}
+
+    def step(self, actions):
+        resetting = self.needs_reset.copy()
+        lander = self.lander
+        actions = np.where(resetting | lander.landed, engine.NOOP, np.asarray(actions, dtype=np.int64))
+        score = lander.score.copy()
+        lander.step(actions)
+        codes, line = lander.check_collision()
+        codes[resetting] = NONE
+        lander.handle_landing(codes, line)
+        self.episode_steps[~resetting] += 1
+
+        rewards = lander.score - score
+        rewards[codes == CRASHED] -= self.crash_penalty
+        terminated = codes != NONE
+        truncated = ~terminated & ~resetting & (self.episode_steps >= self.max_steps)
+        # Crashed landers are frozen like landed ones until their reset
+        lander.landed |= terminated
+        # Finished landers are reset after the physics step, so their next episode starts from a fresh clock and
+        # the observation returned now is its first state, as from LanderEnv.reset
+        if resetting.any():
+            self.reset_envs(resetting)
+            rewards[resetting] = 0
+        self.needs_reset = terminated | truncated
+        infos = {'landed': codes == LANDED, 'crashed': codes == CRASHED}
+        return self.observe(), rewards.astype(np.float32), terminated, truncated, infos
@@ -1,9 +1,12 @@
-import random
 import pygame
+import struct
 import sys
-import math
 from enum import Enum
-from landscape import Landscape, LandscapeLine, Vector2
+import engine
+import resources
+from profiler import FrameProfiler
+from trajectory import TrajectoryReader, TrajectoryWriter
+from landscape import Landscape
 
 
 class GameState(Enum):
@@ -29,8 +32,7 @@ class Button:
         pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.height), 0)
         
         if self.text != '':
-            font = pygame.font.SysFont('comicsans', 60)
-            text = font.render(self.text, 1, (0,0,0))
+            text = resources.label(('button', self.text), self.text, (0,0,0), 'comicsans', 60)
             win.blit(text, (self.x + (self.width/2 - text.get_width()/2), self.y + (self.height/2 - text.get_height()/2)))
 
     def is_over(self, pos):
@@ -44,143 +46,67 @@ class Button:
 
 
 
-class Lander:
-    def __init__(self, position, angle=0, gravity=0.02, thrust_power=0.04, initial_fuel=1000, init_landed=False, init_score_added=False):
-        self.position = position
-        self.angle = angle
-        self.target_angle = angle
-        self.velocity = [0, 0]
-        self.size = 15
-        self.gravity = gravity
-        self.thrust_power = thrust_power
-        self.fuel = initial_fuel
-        self.last_rotation_time = 0
-        self.rotation_delay = 150
-        self.rotation_speed = 1.75  
-        self.landed = init_landed
-        self.score_added = init_score_added
-
-
-    def rotate_left(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_rotation_time >= self.rotation_delay:
-            self.target_angle = max(-90, self.target_angle - 15)
-            self.last_rotation_time = current_time
-
-    def rotate_right(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_rotation_time >= self.rotation_delay:
-            self.target_angle = min(90, self.target_angle + 15)
-            self.last_rotation_time = current_time
-
-    def update_rotation(self):
-        if self.angle != self.target_angle:
-            if self.angle < self.target_angle:
-                self.angle = min(self.angle + self.rotation_speed, self.target_angle)
-            else:
-                self.angle = max(self.angle - self.rotation_speed, self.target_angle)
-
-    def apply_thrust(self):
-        if self.fuel > 0:
-            self.velocity[0] += math.sin(math.radians(self.angle)) * self.thrust_power
-            self.velocity[1] -= math.cos(math.radians(self.angle)) * self.thrust_power
-            self.fuel -= 1
+class Lander(engine.Lander):
+    __slots__ = ('screen_box', 'screen_pos', 'icon_rect')
 
-    def update_position(self):
-        if self.landed:
-            # Skip position and velocity updates if landed to prevent bobbing or phasing through.
-            return
-        self.velocity[1] += self.gravity
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
-        self.position[0] = self.position[0] % landscape.width
-        self.position[1] = max(0, min(self.position[1], landscape.height))
-
-    def check_collision(self, landscape):
-        lander_rect = pygame.Rect(self.position[0] - self.size, self.position[1] - self.size, self.size * 2, self.size * 2)
-
-        # Calculate which tile the lander is in
-        tile_offset = int(self.position[0] // landscape.tileWidth) * landscape.tileWidth
-
-        for line in landscape.lines:
-            line_start = Vector2(line.p1.x + tile_offset, line.p1.y)
-            line_end = Vector2(line.p2.x + tile_offset, line.p2.y)
-            if lander_rect.clipline(line_start.x, line_start.y, line_end.x, line_end.y):
-                if line.landable and -5 <= self.angle <= 5 and abs(self.velocity[0]) <= 0.5 and abs(self.velocity[1]) <= 0.5:
-                    return 'landed'
-                else:
-                    return 'crashed'
+    def __init__(self, position, angle=0, gravity=0.02, thrust_power=0.04, initial_fuel=1000, init_landed=False, init_score_added=False):
+        super().__init__(position, angle, gravity, thrust_power, initial_fuel, init_landed, init_score_added, clock=sim_clock.ticks)
+        # Screen-space copy of the collision triangle, rewritten in place every frame
+        self.screen_box = [[0.0, 0.0], [0.0, 0.0], [0.0, 0.0]]
+        self.screen_pos = [0.0, 0.0]
+        self.icon_rect = pygame.Rect(0, 0, 0, 0)
 
-        return None
+    def update_score(self, points):
+        global score
+        score += points
 
     def handle_landing(self, obj):
-        if not self.landed:
-            print("Landing successful.")
-            self.velocity = [0, 0]
-            self.landed = True
-            if not self.score_added:
-                multiplier = obj.multiplier if hasattr(obj, 'multiplier') else obj.bonus_multiplier
-                self.update_score(100 * multiplier)
-                self.fuel += 100 + (100 * multiplier)
-                self.fuel = min(self.fuel, 1000)
-                self.score_added = True
-                if isinstance(obj, LandscapeLine):
-                    self.position[1] = obj.p1.y - self.size
-                elif isinstance(obj, LandingPad):
-                    self.position[1] = obj.rect.top - self.size
-            return 'landed'
-        else:
+        if self.landed:
             print("Lander already landed.")
             return None
+        print("Landing successful.")
+        return super().handle_landing(obj)
 
     def draw_collision_box(self, surface, camera):
-        points = [
-            (self.position[0] + self.size * math.sin(math.radians(self.angle)), self.position[1] - self.size * math.cos(math.radians(self.angle))),
-            (self.position[0] - self.size * math.sin(math.radians(self.angle + 120)), self.position[1] + self.size * math.cos(math.radians(self.angle + 120))),
-            (self.position[0] - self.size * math.sin(math.radians(self.angle - 120)), self.position[1] + self.size * math.cos(math.radians(self.angle - 120))),
-        ]
-
-        adjusted_points = [world_to_screen(p, camera, landscape) for p in points]
-        pygame.draw.polygon(surface, (255, 0, 0), adjusted_points, 2)
-
-    def reset_position(self):
-        self.position = [random.randint(0, WINDOW_WIDTH), -self.size]  # Start above the visible area
-        self.velocity = [0, 0]
-        self.landed = False
-        self.score_added = False  # Reset score flag for next landing or crash
-        
+        for world, screen in zip(self.update_box(), self.screen_box):
+            world_to_screen(world, camera, landscape, screen)
+        return pygame.draw.polygon(surface, (255, 0, 0), self.screen_box, 2)
+
     def draw(self, surface, camera):
-        screen_pos = world_to_screen(self.position, camera, landscape)
-        lander_icon = pygame.image.load("assets/lander.png").convert_alpha()
-        rotated_icon = pygame.transform.rotate(lander_icon, -self.angle)
-        icon_rect = rotated_icon.get_rect(center=screen_pos)
-        surface.blit(rotated_icon, icon_rect)
+        x, y = world_to_screen(self.position, camera, landscape, self.screen_pos)
+        rotated_icon = resources.rotated("assets/lander.png", self.angle)
+        # Centred like get_rect(center=...), but moving the preallocated icon_rect
+        icon_rect = self.icon_rect
+        icon_rect.w = rotated_icon.get_width()
+        icon_rect.h = rotated_icon.get_height()
+        icon_rect.centerx = x
+        icon_rect.centery = y
+        # Returns every rect drawn, for dirty-rect updates
+        rects = [surface.blit(rotated_icon, icon_rect)]
 
         # Draw the metrics, score, and time
-        self.draw_metrics(surface)
-        self.draw_score(surface)
-        self.draw_time(surface)
+        rects += self.draw_metrics(surface)
+        rects.append(self.draw_score(surface))
+        rects.append(self.draw_time(surface))
+        return rects
 
     def draw_metrics(self, surface):
-        font = pygame.font.SysFont("Arial", 18)
-        altitude_text = font.render(f"Altitude: {int(WINDOW_HEIGHT - self.position[1])}", True, (255, 255, 255))
-        horizontal_speed_text = font.render(f"Horizontal Speed: {int(self.velocity[0])}", True, (255, 255, 255))
-        vertical_speed_text = font.render(f"Vertical Speed: {int(self.velocity[1])}", True, (255, 255, 255))
-        surface.blit(altitude_text, (10, 30))
-        surface.blit(horizontal_speed_text, (10, 50))
-        surface.blit(vertical_speed_text, (10, 70))
+        altitude_text = resources.label('altitude', f"Altitude: {int(landscape.heightMap().clearance(self.position[0], self.position[1], self.size))}")
+        horizontal_speed_text = resources.label('horizontal_speed', f"Horizontal Speed: {int(self.velocity[0])}")
+        vertical_speed_text = resources.label('vertical_speed', f"Vertical Speed: {int(self.velocity[1])}")
+        return [surface.blit(altitude_text, (10, 30)),
+                surface.blit(horizontal_speed_text, (10, 50)),
+                surface.blit(vertical_speed_text, (10, 70))]
 
     def draw_score(self, surface):
-        font = pygame.font.SysFont("Arial", 18)
-        score_text = font.render(f"Score: {score}", True, (255, 255, 255))
-        surface.blit(score_text, (10, 90))
+        score_text = resources.label('score', f"Score: {score}")
+        return surface.blit(score_text, (10, 90))
 
     def draw_time(self, surface):
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.ticks()
         elapsed_time = (current_time - start_time) // 1000
-        font = pygame.font.SysFont("Arial", 18)
-        time_text = font.render(f"Time: {elapsed_time}", True, (255, 255, 255))
-        surface.blit(time_text, (10, 110))
+        time_text = resources.label('time', f"Time: {elapsed_time}")
+        return surface.blit(time_text, (10, 110))
 
 BLUE = (0, 0, 122)
 GREEN = (0, 255, 0)
@@ -252,10 +178,87 @@ class Camera:
             self.rect.left -= landscape.width
 
 
-def world_to_screen(pos, camera, landscape):
-    x = (pos[0] - camera.rect.left) % landscape.width
-    y = pos[1] - camera.rect.top
-    return (x, y)
+class DirtyRects:
+    # Dirty-rect presentation: only what changed since last frame is repainted and pushed. When the camera moves
+    # the back buffer is scrolled by the same amount, so only the strip it uncovered needs the terrain drawn again
+    def __init__(self):
+        self.previous = []
+        self.updates = []
+        self.camera = None
+        self.size = None
+        self.full = True
+
+    def begin(self, surface, camera, landscape):
+        # Returns True when the whole screen must be redrawn; otherwise last frame's rects, and any strip uncovered
+        # by scrolling, are restored to background
+        camera_pos = camera.rect.topleft
+        size = surface.get_size()
+        self.full = self.camera is None or size != self.size
+        self.updates = list(self.previous)
+        repaint = self.previous
+        if not self.full and camera_pos != self.camera:
+            dx = self.camera[0] - camera_pos[0]
+            dy = self.camera[1] - camera_pos[1]
+            # A wrap of the camera, or a jump past the window, has nothing worth keeping
+            if abs(dx) >= min(size[0], landscape.width / 2) or abs(dy) >= size[1]:
+                self.full = True
+            else:
+                surface.scroll(dx, dy)
+                # Last frame's sprites moved with the scroll; clear them where they are now
+                repaint = [rect.move(dx, dy) for rect in self.previous] + self.exposed(size, dx, dy)
+                self.updates += repaint + self.moved(camera.rect, landscape, dx, dy)
+        self.camera = camera_pos
+        self.size = size
+        if not self.full:
+            for rect in repaint:
+                surface.set_clip(rect)
+                surface.fill((0, 0, 0))
+                landscape.render(surface, camera.rect)
+            surface.set_clip(None)
+        return self.full
+
+    @staticmethod
+    def exposed(size, dx, dy):
+        # Strips of the window a scroll by (dx, dy) leaves without terrain
+        width, height = size
+        strips = []
+        if dx:
+            strips.append(pygame.Rect(0 if dx > 0 else width + dx, 0, abs(dx), height))
+        if dy:
+            strips.append(pygame.Rect(0, 0 if dy > 0 else height + dy, width, abs(dy)))
+        return strips
+
+    @staticmethod
+    def moved(camera_rect, landscape, dx, dy, pad=3):
+        # Where scrolled terrain was or now is on screen: the band the lines span, and each visible star. The rest
+        # of the window is black before and after the scroll, so it needs no update
+        top = min(landscape.py) - pad - camera_rect.top
+        bottom = landscape.height + pad - camera_rect.top
+        rects = [pygame.Rect(0, top, camera_rect.width, bottom - top)]
+        if dy:
+            rects.append(rects[0].move(0, -dy))
+        start_tile = int(camera_rect.left // landscape.tileWidth)
+        end_tile = int((camera_rect.right + landscape.tileWidth - 1) // landscape.tileWidth)
+        for tile in range(start_tile, end_tile + 1):
+            left = round(tile * landscape.tileWidth - camera_rect.left)
+            for x, y in zip(landscape.starX, landscape.starY):
+                star = pygame.Rect(left + x - pad, y - camera_rect.top - pad, 2 * pad + 1, 2 * pad + 1)
+                rects += [star, star.move(-dx, -dy)]
+        return rects
+
+    def end(self, rects):
+        if self.full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.updates + rects)
+        self.previous = rects
+
+
+def world_to_screen(pos, camera, landscape, out):
+    # Writes into out, a preallocated [x, y] list, so drawing allocates nothing per object
+    out[0] = (pos[0] - camera.rect.left) % landscape.width
+    out[1] = pos[1] - camera.rect.top
+    return out
 
 
 class Map:
@@ -278,20 +281,27 @@ class Map:
 
 WINDOW_WIDTH = 1400
 WINDOW_HEIGHT = 900
-
-pygame.init()
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
-clock = pygame.time.Clock()
 FPS = 120
-
+# Simulated seconds per real second; above 1 the game runs faster than real time and skips the in-between frames
+TIME_SCALE = 1
+sim_clock = engine.SimClock(FPS, max_steps=8 * TIME_SCALE)
+
+screen = None
+clock = None
+# Per-phase frame timing; F3 toggles it and the overlay in game
+profiler = FrameProfiler()
+# Set by --dirty-rects: update only changed regions instead of flipping the whole screen
+dirty = None
+# Set by --capture: a capture.FrameCapture that receives every presented frame
+capture = None
+# Set by --autopilot: an autopilot.Autopilot that flies the lander in place of the arrow keys
+autopilot = None
 score = 0
-start_time = pygame.time.get_ticks()
+start_time = 0
 
 
 def reset_game():
-    global lander, camera
-    lander = Lander([WINDOW_WIDTH / 2, 50], initial_fuel=1000)
-    camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT)
+    lander.reset([WINDOW_WIDTH / 2, 50])
 
 
 
@@ -299,6 +309,36 @@ lander = Lander([WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2], initial_fuel=1000)
 landscape = Landscape()
 camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT)
 
+# Game-level state after the lander's: camera rect, score, sim clock, start time, zone state and game state
+GAME_STATE = struct.Struct('<4iqqdqqdb')
+
+
+def snapshot(buffer=None):
+    # The whole world as one flat buffer; pass a bytearray of snapshot_size() to reuse it
+    rect = camera.rect
+    values = (rect.x, rect.y, rect.width, rect.height, score, sim_clock.steps, sim_clock.accumulator, start_time,
+              landscape.currentCombi, landscape.flickerProgress, current_game_state.value)
+    if buffer is None:
+        return lander.snapshot() + GAME_STATE.pack(*values)
+    lander.snapshot(buffer)
+    GAME_STATE.pack_into(buffer, engine.LANDER_STATE.size, *values)
+    return buffer
+
+
+def snapshot_size():
+    return engine.LANDER_STATE.size + GAME_STATE.size
+
+
+def restore(buffer):
+    global score, start_time, current_game_state
+    lander.restore(buffer)
+    (camera.rect.x, camera.rect.y, camera.rect.width, camera.rect.height, score, sim_clock.steps,
+     sim_clock.accumulator, start_time, combi, landscape.flickerProgress, state) = GAME_STATE.unpack_from(buffer, engine.LANDER_STATE.size)
+    if combi != landscape.currentCombi:
+        landscape.setZoneCombi(combi)
+    current_game_state = GameState(state)
+
+
 def show_main_menu():
     global current_game_state
     # Here, you would typically display the main menu and wait for the player to start the game.
@@ -307,97 +347,222 @@ def show_main_menu():
 
 current_game_state = GameState.MAIN_MENU
 
-running = True
-while running:
-    
-    if current_game_state == GameState.MAIN_MENU:
-            start_button = Button(WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2 - 40, 200, 80, 'Start')
-            if current_game_state == GameState.MAIN_MENU:
-                start_button.draw(screen, (0,0,0))  # screen is your Pygame display surface
-                pygame.display.update()
-            for event in pygame.event.get():
-                pos = pygame.mouse.get_pos()
+
+def draw_profile(surface):
+    # Overlay of rolling per-phase frame times, top right
+    x = surface.get_width() - 330
+    area = surface.blit(resources.label('profile_header', f"{'phase':<10}{'p50':>7}{'p95':>7}{'p99':>7} ms", name="Courier", size=16), (x, 10))
+    for row, (name, stats) in enumerate(profiler.summary().items()):
+        text = f"{name:<10}{stats['p50']:>7.2f}{stats['p95']:>7.2f}{stats['p99']:>7.2f}"
+        area.union_ip(surface.blit(resources.label(('profile', name), text, name="Courier", size=16), (x, 30 + 18 * row)))
+    return area
+
+
+def main(record_path=None, profile_path=None):
+    global WINDOW_WIDTH, WINDOW_HEIGHT, screen, clock, start_time, lander, current_game_state
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
+    clock = pygame.time.Clock()
+    start_time = sim_clock.ticks()
+    # Every physics step goes to the trajectory log; each crash or landing starts a new episode
+    recorder = TrajectoryWriter(record_path) if record_path else None
+    episode = 0
+
+    running = True
+    while running:
+        if current_game_state == GameState.MAIN_MENU:
+                start_button = Button(WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2 - 40, 200, 80, 'Start')
+                if current_game_state == GameState.MAIN_MENU:
+                    start_button.draw(screen, (0,0,0))  # screen is your Pygame display surface
+                    pygame.display.update()
+                for event in pygame.event.get():
+                    pos = pygame.mouse.get_pos()
                 
-                if event.type == pygame.QUIT:
-                    running = False
-
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if current_game_state == GameState.MAIN_MENU:
-                        if start_button.is_over(pos):
-                            current_game_state = GameState.IN_GAME
-
-    elif current_game_state == GameState.IN_GAME:
-        # Handle all the in-game updates, inputs, and rendering
-        # This includes moving the lander, checking for collisions, etc.
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.VIDEORESIZE:
-                WINDOW_WIDTH, WINDOW_HEIGHT = event.w, event.h
-                screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
-                camera.width, camera.height = WINDOW_WIDTH, WINDOW_HEIGHT
-
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            lander.rotate_left()
-        if keys[pygame.K_RIGHT]:
-            lander.rotate_right()
-        if keys[pygame.K_UP]:
-            lander.apply_thrust()
-        if keys[pygame.K_r]:
-            reset_game()
-        if keys[pygame.K_q]:
-            pygame.quit()
-
-        # Update lander, landscape, camera
-        lander.update_position()
-        lander.update_rotation()
-        camera.update(lander.position, landscape)
-
-
-        screen.fill((0, 0, 0))
-        landscape.render(screen, camera.rect)
-        lander.draw(screen, camera)
-        lander.draw_collision_box(screen, camera)  
-        lander.draw_metrics(screen)
-
-        collision_result = lander.check_collision(landscape)
-        if collision_result:
-            print(collision_result)
-            lander = Lander([lander.position[0], 50])  # Reset vertical position but keep horizontal
-
-        if collision_result == 'landed':
-            current_game_state = GameState.LANDED_CRASHED
-            print("Landed successfully!")
-        elif collision_result == 'crashed':
-            current_game_state = GameState.LANDED_CRASHED
-            print("Crashed!")
-
-        landscape.render(screen, camera.rect)
-        lander_screen_pos = (
-                lander.position[0] - camera.rect.left,
-                lander.position[1] - camera.rect.top
-            )
-
-
-        font = pygame.font.SysFont("Arial", 18)
-        fuel_text = font.render(f"Fuel: {lander.fuel}", True, (255, 255, 255))
-        screen.blit(fuel_text, (10, 10))
+                    if event.type == pygame.QUIT:
+                        running = False
+
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        if current_game_state == GameState.MAIN_MENU:
+                            if start_button.is_over(pos):
+                                current_game_state = GameState.IN_GAME
+
+        elif current_game_state == GameState.IN_GAME:
+            # Handle all the in-game updates, inputs, and rendering
+            # This includes moving the lander, checking for collisions, etc.
+
+            with profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.VIDEORESIZE:
+                        WINDOW_WIDTH, WINDOW_HEIGHT = event.w, event.h
+                        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
+                        camera.width, camera.height = WINDOW_WIDTH, WINDOW_HEIGHT
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        profiler.toggle()
+
+                keys = pygame.key.get_pressed()
+                if keys[pygame.K_r]:
+                    reset_game()
+                if keys[pygame.K_q]:
+                    pygame.quit()
+
+            action = ((engine.ROTATE_LEFT if keys[pygame.K_LEFT] else 0)
+                      | (engine.ROTATE_RIGHT if keys[pygame.K_RIGHT] else 0)
+                      | (engine.THRUST if keys[pygame.K_UP] else 0))
+
+            # Physics runs in fixed steps of simulated time, however long the last frame took
+            for _ in range(sim_clock.advance(clock.get_time() * TIME_SCALE)):
+                with profiler.phase('physics'):
+                    if autopilot is not None:
+                        # Held for the frames the autopilot's table plans each decision over
+                        action = autopilot.hold(lander)
+                    if action & engine.ROTATE_LEFT:
+                        lander.rotate_left()
+                    if action & engine.ROTATE_RIGHT:
+                        lander.rotate_right()
+                    if action & engine.THRUST:
+                        lander.apply_thrust()
+
+                    lander.update_position(landscape)
+                    lander.update_rotation()
+                    # Logged under the step number it ran at, before the tick, as Engine.step does
+                    step = sim_clock.steps
+                    sim_clock.tick()
+
+                with profiler.phase('collision'):
+                    collision_result = lander.check_collision(landscape)
+                if recorder is not None:
+                    recorder.write_lander(episode, step, lander, action, collision_result)
+                if collision_result:
+                    episode += 1
+                    print(collision_result)
+                    lander.reset([lander.position[0], 50])  # Reset vertical position but keep horizontal
+                    if autopilot is not None:
+                        autopilot.release()
+
+                if collision_result == 'landed':
+                    current_game_state = GameState.LANDED_CRASHED
+                    print("Landed successfully!")
+                    break
+                elif collision_result == 'crashed':
+                    current_game_state = GameState.LANDED_CRASHED
+                    print("Crashed!")
+                    break
+
+            with profiler.phase('camera'):
+                camera.update(lander.position, landscape)
+
+            with profiler.phase('render'):
+                if dirty is None or dirty.begin(screen, camera, landscape):
+                    screen.fill((0, 0, 0))
+                    landscape.render(screen, camera.rect)
+            with profiler.phase('draw'):
+                rects = lander.draw(screen, camera)
+                rects.append(lander.draw_collision_box(screen, camera))
+                rects += lander.draw_metrics(screen)
+
+
+            fuel_text = resources.label('fuel', f"Fuel: {lander.fuel}")
+            rects.append(screen.blit(fuel_text, (10, 10)))
+
+            if profiler.enabled:
+                rects.append(draw_profile(screen))
+            if capture is not None:
+                capture.capture(screen)
+
+            with profiler.phase('flip'):
+                if dirty is None:
+                    pygame.display.flip()
+                else:
+                    dirty.end(rects)
+            profiler.end_frame()
+            clock.tick(FPS)
 
 
         
-        pygame.display.flip()
-        clock.tick(FPS)
 
+        elif current_game_state == GameState.LANDED_CRASHED:
+            # Pause, show results, wait for input, or automatically restart after a delay
+            pygame.time.delay(1)  # For example, a 7-second pause
+            current_game_state = GameState.IN_GAME  # Go back to in-game state for this example
 
-        
+    if recorder is not None:
+        recorder.close()
+    if profile_path:
+        profiler.export(profile_path)
+    pygame.quit()
 
-    elif current_game_state == GameState.LANDED_CRASHED:
-        # Pause, show results, wait for input, or automatically restart after a delay
-        pygame.time.delay(1)  # For example, a 7-second pause
-        current_game_state = GameState.IN_GAME  # Go back to in-game state for this example
 
+def replay(path, episode=None):
+    # Plays a recorded trajectory back through the normal camera and drawing code, without physics
+    global screen, clock
 
-pygame.quit()
-sys.exit()
\ No newline at end of file
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
+    clock = pygame.time.Clock()
+    ghost = Lander([0, 0])
+
+    with TrajectoryReader(path) as reader:
+        for step in reader:
+            if episode is not None and step.episode != episode:
+                continue
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+
+            sim_clock.steps = step.step
+            ghost.position = [step.x, step.y]
+            ghost.velocity = [step.vx, step.vy]
+            ghost.angle = step.angle
+            ghost.fuel = step.fuel
+            camera.update(ghost.position, landscape)
+
+            screen.fill((0, 0, 0))
+            landscape.render(screen, camera.rect)
+            ghost.draw(screen, camera)
+            screen.blit(resources.label('fuel', f"Fuel: {ghost.fuel}"), (10, 10))
+            if capture is not None:
+                capture.capture(screen)
+            pygame.display.flip()
+            clock.tick(FPS * TIME_SCALE)
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lunar lander")
+    parser.add_argument("--record", metavar="PATH", help="append every physics step to this trajectory file")
+    parser.add_argument("--replay", metavar="PATH", help="play back a trajectory file instead of the game")
+    parser.add_argument("--episode", type=int, help="with --replay, only show this episode")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler and its overlay on (F3 toggles)")
+    parser.add_argument("--profile-out", metavar="PATH", help="on exit, write profiler samples to PATH (.csv or .json)")
+    parser.add_argument("--dirty-rects", action="store_true", help="update only the changed screen regions, scrolling the frame as the camera moves")
+    parser.add_argument("--capture", metavar="PATH", help="save every frame: a directory of PNGs, or one raw rgb24 file")
+    parser.add_argument("--capture-format", choices=("png", "raw"), default="png")
+    parser.add_argument("--autopilot", action="store_true", help="let the precomputed autopilot fly (plans its table on first use; see src/autopilot.py --build)")
+    args = parser.parse_args()
+    profiler.enabled = profiler.requested = args.profile
+    if args.dirty_rects:
+        dirty = DirtyRects()
+    if args.capture:
+        from capture import FrameCapture
+
+        capture = FrameCapture(args.capture, (WINDOW_WIDTH, WINDOW_HEIGHT), args.capture_format)
+    if args.autopilot:
+        from autopilot import Autopilot, print_progress
+
+        # Plans the table before the window opens when it is not cached yet, reporting progress on stderr
+        autopilot = Autopilot(landscape, progress=print_progress)
+    try:
+        if args.replay:
+            replay(args.replay, args.episode)
+        else:
+            main(args.record, args.profile_out)
+    finally:
+        if capture is not None:
+            capture.close()
+            print(f"Captured {capture.frames} frames, dropped {capture.dropped}")
+    sys.exit()
@@ -0,0 +1,73 @@
+import bisect
+import math
+from array import array
+
+
+class HeightMap:
+    # One tile of terrain sampled every `resolution` pixels, so altitude and pad queries are array reads
+    def __init__(self, landscape, resolution=1.0):
+        self.resolution = resolution
+        self.tileWidth = landscape.tileWidth
+        self.columns = int(math.ceil(self.tileWidth / resolution))
+        # Zone combination the pad columns belong to; Landscape.heightMap rebuilds the map when it changes
+        self.currentCombi = landscape.currentCombi
+
+        active = set(landscape.zoneCombis[landscape.currentCombi]) if landscape.zoneCombis else set()
+        zoneOfLine = {zone.lineNum: i for i, zone in enumerate(landscape.availableZones)}
+
+        # ground has one extra sample at the right edge so interpolation never reads past the end
+        self.ground = array('f')
+        self.zone = array('h')
+        self.multiplier = array('i')
+        pads = []
+        for i in range(self.columns + 1):
+            line, y = landscape.lineAt(i * resolution)
+            self.ground.append(y)
+            if i == self.columns:
+                break
+            if line >= 0 and landscape.landable[line]:
+                zone = zoneOfLine.get(line, -1)
+                self.zone.append(zone)
+                self.multiplier.append(landscape.multiplier[line])
+                if zone in active:
+                    pads.append((i + 0.5) * resolution)
+            else:
+                self.zone.append(-1)
+                self.multiplier.append(0)
+
+        self.slope = array('f', [(self.ground[i + 1] - self.ground[i]) / resolution for i in range(self.columns)])
+
+        # Signed x distance from each column centre to the nearest active pad column, across the tile wrap
+        self.padDistance = array('f', [math.inf]) * self.columns
+        if pads:
+            wrapped = [x - self.tileWidth for x in pads] + pads + [x + self.tileWidth for x in pads]
+            for i in range(self.columns):
+                centre = (i + 0.5) * resolution
+                j = bisect.bisect_left(wrapped, centre)
+                self.padDistance[i] = min((wrapped[k] - centre for k in (j - 1, j)), key=abs)
+
+    def column(self, x):
+        return min(self.columns - 1, int(x % self.tileWidth / self.resolution))
+
+    def groundAt(self, x):
+        position = x % self.tileWidth / self.resolution
+        i = min(self.columns - 1, int(position))
+        return self.ground[i] + (self.ground[i + 1] - self.ground[i]) * (position - i)
+
+    def clearance(self, x, y, size=0):
+        # Height of a box of half-size `size` centred at (x, y) above the ground; negative when below it
+        return self.groundAt(x) - y - size
+
+    def slopeAt(self, x):
+        return self.slope[self.column(x)]
+
+    def zoneAt(self, x):
+        # Index into Landscape.availableZones of the pad under x, or -1
+        return self.zone[self.column(x)]
+
+    def multiplierAt(self, x):
+        # Score multiplier for landing at x; 0 where the ground is not landable
+        return self.multiplier[self.column(x)]
+
+    def padDistanceAt(self, x):
+        return self.padDistance[self.column(x)]
@@ -0,0 +1,126 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+# File layout: one header, then the sections below back to back, each starting on an 8-byte boundary.
+# Numbers are little-endian; coordinates are world units at the stored landscale.
+MAGIC = b'LLLS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHdddIIIII')
+# name, array typecode, which count from sizes() gives its length
+SECTIONS = (
+    ('px', 'f', 'points'),
+    ('py', 'f', 'points'),
+    ('landable', 'b', 'lines'),
+    ('starX', 'f', 'stars'),
+    ('starY', 'f', 'stars'),
+    # (line, multiplier) pairs
+    ('zones', 'i', 'zoneValues'),
+    # Combination c lists combiZones[combiStarts[c]:combiStarts[c + 1]]
+    ('combiStarts', 'i', 'combiStarts'),
+    ('combiZones', 'i', 'members'),
+)
+ITEM_SIZE = {'f': 4, 'b': 1, 'i': 4}
+
+DEFAULT_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'assets', 'default.landscape'))
+
+
+def aligned(offset):
+    return (offset + 7) & ~7
+
+
+def sizes(points, stars, zones, combis, members):
+    return {'points': points, 'lines': max(points - 1, 0), 'stars': stars, 'zoneValues': 2 * zones,
+            'combiStarts': combis + 1, 'members': members}
+
+
+def layout(counts):
+    # (name, typecode, offset, count) of every section after the header, and the file size
+    lengths = sizes(*counts)
+    offset = aligned(HEADER.size)
+    result = []
+    for name, typecode, key in SECTIONS:
+        count = lengths[key]
+        result.append((name, typecode, offset, count))
+        offset = aligned(offset + count * ITEM_SIZE[typecode])
+    return result, offset
+
+
+def save(landscape, path):
+    # Writes the packed arrays, zones and combinations of any Landscape
+    combiStarts = [0]
+    for combi in landscape.zoneCombis:
+        combiStarts.append(combiStarts[-1] + len(combi))
+    data = {
+        'px': landscape.px, 'py': landscape.py, 'landable': landscape.landable,
+        'starX': landscape.starX, 'starY': landscape.starY,
+        'zones': [value for zone in landscape.availableZones for value in (zone.lineNum, zone.multiplier)],
+        'combiStarts': combiStarts,
+        'combiZones': [zone for combi in landscape.zoneCombis for zone in combi],
+    }
+    counts = (len(landscape.px), len(landscape.starX), len(landscape.availableZones),
+              len(landscape.zoneCombis), combiStarts[-1])
+    sections, size = layout(counts)
+    out = bytearray(size)
+    HEADER.pack_into(out, 0, MAGIC, VERSION, 0, landscape.landscale, landscape.tileWidth, landscape.height, *counts)
+    for name, typecode, offset, count in sections:
+        fmt = f'<{count}{typecode}'
+        struct.pack_into(fmt, out, offset, *data[name])
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+class LandscapeFile:
+    # Memory-mapped landscape; the arrays are views into the map, so pages are only read when touched.
+    # The map is copy-on-write: edits through the views (e.g. LandscapePoint setters) never reach the file.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self.map) < HEADER.size:
+            raise ValueError(f"{path} is not a version {VERSION} landscape file")
+        magic, version, _, self.landscale, self.tileWidth, self.height, *counts = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} landscape file")
+        sections, size = layout(counts)
+        if len(self.map) < size:
+            raise ValueError(f"{path} is truncated")
+
+        view = memoryview(self.map)
+        for name, typecode, offset, count in sections:
+            section = view[offset:offset + count * ITEM_SIZE[typecode]].cast(typecode)
+            if sys.byteorder != 'little' and typecode != 'b':
+                section = array(typecode, section)
+                section.byteswap()
+            setattr(self, name, section)
+
+    def zoneList(self):
+        return [(self.zones[i], self.zones[i + 1]) for i in range(0, len(self.zones), 2)]
+
+    def combiList(self):
+        starts = self.combiStarts
+        return [list(self.combiZones[starts[c]:starts[c + 1]]) for c in range(len(starts) - 1)]
+
+
+def main(argv=None):
+    # Regenerates the shipped map from Landscape.setupData
+    from landscape import Landscape
+
+    parser = argparse.ArgumentParser(description="Write the hand-built landscape in the binary landscape format.")
+    parser.add_argument("output", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--landscale", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=0, help="seed for the scattered stars")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    landscape = Landscape(args.landscale, path='')
+    save(landscape, args.output)
+    print(f"{len(landscape.px)} points, {len(landscape.starX)} stars -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,90 @@
 import random
-import pygame
+from array import array
+from collections.abc import Sequence
+from functools import cached_property
+
+from landfile import DEFAULT_PATH, LandscapeFile
 
 class Vector2:
+    # Plain point used while building a landscape; setupData appends these before packing
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
+class LandscapePoint:
+    # Vector2-compatible view of one packed point; reads and writes go to the landscape's arrays
+    __slots__ = ('landscape', 'index')
+
+    def __init__(self, landscape, index):
+        self.landscape = landscape
+        self.index = index
+
+    @property
+    def x(self):
+        return self.landscape.px[self.index]
+
+    @x.setter
+    def x(self, value):
+        self.landscape.px[self.index] = value
+
+    @property
+    def y(self):
+        return self.landscape.py[self.index]
+
+    @y.setter
+    def y(self, value):
+        self.landscape.py[self.index] = value
+
 class LandscapeLine:
-    def __init__(self, p1, p2):
-        self.p1 = p1
-        self.p2 = p2
-        self.landable = (p1.y == p2.y)
-        self.multiplier = 1
+    # View of segment index, which runs from point index to point index + 1
+    __slots__ = ('landscape', 'index')
+
+    def __init__(self, landscape, index):
+        self.landscape = landscape
+        self.index = index
+
+    @property
+    def p1(self):
+        return LandscapePoint(self.landscape, self.index)
+
+    @property
+    def p2(self):
+        return LandscapePoint(self.landscape, self.index + 1)
+
+    @property
+    def landable(self):
+        return bool(self.landscape.landable[self.index])
+
+    @property
+    def multiplier(self):
+        return self.landscape.multiplier[self.index]
+
+    @multiplier.setter
+    def multiplier(self, value):
+        self.landscape.multiplier[self.index] = value
+
+class ArrayViews(Sequence):
+    # Read-only list stand-in that makes a view object per access instead of holding one per item
+    __slots__ = ('landscape', 'view', 'length')
+
+    def __init__(self, landscape, view, length):
+        self.landscape = landscape
+        self.view = view
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.view(self.landscape, i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self.view(self.landscape, index)
 
 class LandingZone:
     def __init__(self, linenum, multi):
@@ -19,44 +92,171 @@ class LandingZone:
         self.multiplier = multi
 
 class Landscape:
-    def __init__(self):
+    # Binary map loaded by default; subclasses that generate their terrain in setupData set this to None
+    dataFile = DEFAULT_PATH
+    # Width of the line index buckets; buildLineIndex may set another
+    bucketWidth = 32
+
+    def __init__(self, landscale=1.5, path=None):
+        # path overrides dataFile; an empty path builds the map from setupData
         self.points = []
-        self.lines = []
         self.stars = []
+        self.heightMaps = {}
         self.availableZones = []
         self.zoneCombis = []
         self.currentCombi = 0
         self.zoneInfos = []
-        self.landscale = 1.5
+        self.landscale = landscale
         self.flickerProgress = 0
 
-        self.setupData()
+        path = self.dataFile if path is None else path
+        if path:
+            self.load(path)
+        else:
+            self.setupData()
+            self.pack(self.starRandom())
+        self.applyZones()
 
-        self.tileWidth = self.points[-1].x * self.landscale
+        self.width = self.tileWidth  # Set width to tileWidth for a single tile
 
-        for p in self.points:
-            p.x *= self.landscale
-            p.y *= self.landscale
-            p.y -= 50 * self.landscale
+    @cached_property
+    def buckets(self):
+        # The line index is built on first use, so loading a map only maps the file
+        self.buildLineIndex(self.bucketWidth)
+        return self.__dict__['buckets']
 
-        for i in range(1, len(self.points)):
-            p1 = self.points[i - 1]
-            p2 = self.points[i]
-            self.lines.append(LandscapeLine(p1, p2))
+    def starRandom(self):
+        # Source of the scattered stars added by pack; the hand-built map uses the global RNG
+        return random
 
-        for i in range(len(self.stars)):
-            self.stars[i]['x'] *= self.landscale
-            self.stars[i]['y'] *= self.landscale
+    def pack(self, rng=random):
+        # Moves the Vector2s from setupData into flat float32 arrays, scaled by landscale
+        raw = self.points
+        scale = self.landscale
+        self.tileWidth = raw[-1].x * scale
+        self.px = array('f', [p.x * scale for p in raw])
+        self.py = array('f', [p.y * scale - 50 * scale for p in raw])
+        self.buildViews()
+        self.landable = array('b', [y1 == y2 for y1, y2 in zip(self.y1, self.y2)])
+        # Calculate the total height of the landscape
+        self.height = max(self.py)
 
-        for line in self.lines:
-            if random.random() < 0.1:
-                star = {'x': line.p1.x, 'y': random.random() * 600}
-                if star['y'] < line.p1.y and star['y'] < line.p2.y:
-                    self.stars.append(star)
+        stars = self.stars
+        self.starX = array('f', [star['x'] * scale for star in stars])
+        self.starY = array('f', [star['y'] * scale for star in stars])
+        for x, y1, y2 in zip(self.x1, self.y1, self.y2):
+            if rng.random() < 0.1:
+                y = rng.random() * 600
+                if y < y1 and y < y2:
+                    self.starX.append(x)
+                    self.starY.append(y)
+        del self.stars
 
-        # Calculate the total height of the landscape
-        self.height = max(p.y for p in self.points)
-        self.width = self.tileWidth  # Set width to tileWidth for a single tile
+    def buildViews(self):
+        # New arrays invalidate any line index built over the old ones
+        self.__dict__.pop('buckets', None)
+        self.points = ArrayViews(self, LandscapePoint, len(self.px))
+        # Segment endpoints are zero-copy views sharing the point arrays
+        self.x1 = memoryview(self.px)[:-1]
+        self.y1 = memoryview(self.py)[:-1]
+        self.x2 = memoryview(self.px)[1:]
+        self.y2 = memoryview(self.py)[1:]
+        count = len(self.px) - 1
+        self.multiplier = array('i', [1]) * count
+        self.lines = ArrayViews(self, LandscapeLine, count)
+
+    def load(self, path):
+        # Arrays stay views into the memory-mapped file unless landscale differs from the one it was saved at
+        data = LandscapeFile(path)
+        self.dataMap = data
+        factor = self.landscale / data.landscale
+        if factor == 1:
+            self.px, self.py, self.starX, self.starY = data.px, data.py, data.starX, data.starY
+        else:
+            self.px, self.py, self.starX, self.starY = (array('f', [v * factor for v in values])
+                                                        for values in (data.px, data.py, data.starX, data.starY))
+        self.tileWidth = data.tileWidth * factor
+        self.height = data.height * factor
+        self.buildViews()
+        self.landable = data.landable
+        self.availableZones = [LandingZone(line, multiplier) for line, multiplier in data.zoneList()]
+        self.zoneCombis = data.combiList()
+        del self.stars
+
+    def applyZones(self):
+        # Lines of the zones in the current combination score their zone's multiplier, all others score 1
+        self.multiplier[:] = array('i', [1]) * len(self.multiplier)
+        if self.zoneCombis:
+            for zone in self.zoneCombis[self.currentCombi]:
+                zone = self.availableZones[zone]
+                self.multiplier[zone.lineNum] = zone.multiplier
+
+    def setZoneCombi(self, combi):
+        self.currentCombi = combi % len(self.zoneCombis)
+        self.applyZones()
+        self.heightMaps = {}
+
+    def buildLineIndex(self, bucketWidth=32):
+        # Uniform grid over x: each bucket lists the indices of the lines overlapping it
+        self.bucketWidth = bucketWidth
+        self.buckets = [[] for _ in range(int(self.tileWidth // bucketWidth) + 1)]
+        last = len(self.buckets) - 1
+        for i, (xa, xb) in enumerate(zip(self.x1, self.x2)):
+            x0 = min(xa, xb)
+            x1 = max(xa, xb)
+            for b in range(max(0, int(x0 // bucketWidth)), min(last, int(x1 // bucketWidth)) + 1):
+                self.buckets[b].append(i)
+
+    def indicesInRange(self, left, right):
+        # Indices of lines whose x-extent may overlap [left, right] (tile coordinates), in their original order
+        last = len(self.buckets) - 1
+        first = max(0, min(last, int(left // self.bucketWidth)))
+        end = max(0, min(last, int(right // self.bucketWidth)))
+        if first == end:
+            return self.buckets[first]
+        return sorted(set().union(*self.buckets[first:end + 1]))
+
+    def linesInRange(self, left, right):
+        return [self.lines[i] for i in self.indicesInRange(left, right)]
+
+    def lineAt(self, x):
+        # (index, ground y) of the highest line spanning world x; index is -1 where no line does
+        local = x % self.tileWidth
+        bucket = max(0, min(len(self.buckets) - 1, int(local // self.bucketWidth)))
+        found, ground = -1, self.height
+        for i in self.buckets[bucket]:
+            xa, xb = self.x1[i], self.x2[i]
+            if min(xa, xb) <= local <= max(xa, xb):
+                ya, yb = self.y1[i], self.y2[i]
+                y = ya if xa == xb else ya + (yb - ya) * (local - xa) / (xb - xa)
+                if y < ground:
+                    found, ground = i, y
+        if found < 0:
+            # The gap between the tile edge and its first or last point continues that point's height
+            if local < self.px[0]:
+                ground = self.py[0]
+            elif local > self.px[-1]:
+                ground = self.py[-1]
+        return found, ground
+
+    def heightMap(self, resolution=1.0):
+        # Built on first use per resolution, and rebuilt when it was made for another zone combination
+        from heightmap import HeightMap
+
+        heightMap = self.heightMaps.get(resolution)
+        if heightMap is None or heightMap.currentCombi != self.currentCombi:
+            heightMap = self.heightMaps[resolution] = HeightMap(self, resolution)
+        return heightMap
+
+    def heightAt(self, x):
+        # Ground y under world x, read from the default height map
+        return self.heightMap().groundAt(x)
+
+    def segmentsNear(self, left, right):
+        # (tile, tile offset, line indices) groups for lines that may touch world x in [left, right]
+        # Calculate which tile the middle of the range is in
+        tile_offset = int((left + right) / 2 // self.tileWidth) * self.tileWidth
+        return ((self, tile_offset, self.indicesInRange(left - tile_offset, right - tile_offset)),)
 
     def setupData(self):
         self.points.append(Vector2(0.5, 355.55))
@@ -237,23 +437,38 @@ class Landscape:
         self.zoneCombis.append([6, 7, 8, 9])
         self.zoneCombis.append([1, 4, 7, 9])
 
+    def tileKey(self):
+        # Everything the rasterized tile depends on; a change forces a rebuild. The zone combination only changes
+        # scores, not colors, so switching it keeps the tile
+        return (self.landscale, self.tileWidth, self.height, len(self.lines), len(self.starX))
+
+    def buildTileSurface(self, pad=2):
+        # Imported here so the simulation can use Landscape without pygame installed
+        import pygame
+
+        # One tile of lines and stars on a colorkeyed surface, padded so wide lines at the edges are kept
+        tile = pygame.Surface((int(self.tileWidth) + 2 * pad + 1, int(self.height) + 2 * pad + 1))
+        tile.set_colorkey((0, 0, 0))
+        for x1, y1, x2, y2, landable in zip(self.x1, self.y1, self.x2, self.y2, self.landable):
+            color = (0, 255, 0) if landable else (255, 255, 255)
+            pygame.draw.line(tile, color, (x1 + pad, y1 + pad), (x2 + pad, y2 + pad), 2)
+        for x, y in zip(self.starX, self.starY):
+            pygame.draw.circle(tile, (255, 255, 255), (x + pad, y + pad), 1)
+        self.tileSurface = tile
+        self.tilePad = pad
+        self.tileSurfaceKey = self.tileKey()
+        return tile
+
+    def renderTile(self, surface, camera_rect, offset):
+        if getattr(self, 'tileSurfaceKey', None) != self.tileKey():
+            self.buildTileSurface()
+        surface.blit(self.tileSurface, (round(offset - camera_rect.left) - self.tilePad, -camera_rect.top - self.tilePad))
+
     def render(self, surface, camera_rect):
+        # Blits the cached tile once per visible repeat instead of redrawing every line and star
         # Calculate which tiles are visible
         start_tile = int(camera_rect.left // self.tileWidth)
         end_tile = int((camera_rect.right + self.tileWidth - 1) // self.tileWidth)
 
         for tile in range(start_tile, end_tile + 1):
-            offset = tile * self.tileWidth
-            
-            # Render landscape lines
-            for line in self.lines:
-                start_pos = (line.p1.x + offset - camera_rect.left, line.p1.y - camera_rect.top)
-                end_pos = (line.p2.x + offset - camera_rect.left, line.p2.y - camera_rect.top)
-                color = (0, 255, 0) if line.landable else (255, 255, 255)
-                pygame.draw.line(surface, color, start_pos, end_pos, 2)
-
-            # Render stars
-            for star in self.stars:
-                star_pos = (star['x'] + offset - camera_rect.left, star['y'] - camera_rect.top)
-                if 0 <= star_pos[0] < camera_rect.width and 0 <= star_pos[1] < camera_rect.height:
-                    pygame.draw.circle(surface, (255, 255, 255), star_pos, 1)
\ No newline at end of file
+            self.renderTile(surface, camera_rect, tile * self.tileWidth)
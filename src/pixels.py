@@ -0,0 +1,155 @@
+import math
+import os
+
+import numpy as np
+
+LANDABLE = (0, 255, 0)
+TERRAIN = (255, 255, 255)
+STAR = (255, 255, 255)
+# The game's sprite, found from this file so the renderer works from any working directory
+SPRITE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'assets', 'lander.png'))
+
+
+def gray(color):
+    return round(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])
+
+
+class PixelRenderer:
+    # Camera views around many landers as one (N, H, W, C) uint8 array, with no display or per-env Surface.
+    # The terrain tile and rotated lander sprites are rasterized once at observation scale; each call is one gather
+    # for the terrain plus one blend for the landers.
+    def __init__(self, landscape, num_envs, size=(64, 64), view=(512, 512), grayscale=False,
+                 sprite=SPRITE, angle_step=1):
+        self.landscape = landscape
+        self.num_envs = num_envs
+        self.width, self.height = size
+        self.view = view
+        self.scale = self.width / view[0]
+        self.channels = 1 if grayscale else 3
+        self.colors = {name: (gray(color),) if grayscale else color
+                       for name, color in (('landable', LANDABLE), ('terrain', TERRAIN), ('star', STAR))}
+        self.angle_step = angle_step
+
+        self.build_tile()
+
+        self.out = np.zeros((num_envs, self.height, self.width, self.channels), dtype=np.uint8)
+        self.index = np.zeros((num_envs, self.height, self.width), dtype=np.int64)
+        self.columns = np.arange(self.width)
+        self.rows = np.arange(self.height)
+        self.build_stamps(load_sprite(sprite) if isinstance(sprite, str) else np.asarray(sprite))
+
+    def build_tile(self):
+        self.tile = self.rasterize()
+        self.tile_rows = self.tile.shape[0] - 1
+        self.tile_cols = self.tile.shape[1]
+        self.tile_flat = self.tile.reshape(-1, self.channels)
+        self.tile_key = self.landscape.tileKey()
+
+    def rasterize(self):
+        # One tile of lines and stars at observation scale; the extra bottom row stays black for off-map rows
+        landscape = self.landscape
+        scale = self.scale
+        cols = max(1, int(round(landscape.tileWidth * scale)))
+        rows = int(math.ceil(landscape.height * scale)) + 2
+        tile = np.zeros((rows + 1, cols, self.channels), dtype=np.uint8)
+
+        x1 = np.frombuffer(landscape.x1, dtype=np.float32) * scale
+        y1 = np.frombuffer(landscape.y1, dtype=np.float32) * scale
+        x2 = np.frombuffer(landscape.x2, dtype=np.float32) * scale
+        y2 = np.frombuffer(landscape.y2, dtype=np.float32) * scale
+        landable = np.frombuffer(landscape.landable, dtype=np.int8)
+        for i in range(len(x1)):
+            # Two samples per pixel of length so thin lines have no gaps
+            steps = max(2, int(math.ceil(2 * math.hypot(x2[i] - x1[i], y2[i] - y1[i]))) + 1)
+            t = np.linspace(0, 1, steps)
+            xs = np.floor(x1[i] + (x2[i] - x1[i]) * t).astype(np.int64) % cols
+            ys = np.clip(np.floor(y1[i] + (y2[i] - y1[i]) * t).astype(np.int64), 0, rows - 1)
+            tile[ys, xs] = self.colors['landable' if landable[i] else 'terrain']
+
+        sx = np.floor(np.frombuffer(landscape.starX, dtype=np.float32) * scale).astype(np.int64) % cols
+        sy = np.clip(np.floor(np.frombuffer(landscape.starY, dtype=np.float32) * scale).astype(np.int64), 0, rows - 1)
+        tile[sy, sx] = self.colors['star']
+        return tile
+
+    def camera(self, position):
+        # Top-left of each view in world pixels, centred on the lander and clamped vertically like game.Camera
+        left = position[:, 0] - self.view[0] / 2
+        top = np.clip(position[:, 1] - self.view[1] / 2, 0, max(0, self.landscape.height - self.view[1]))
+        return left, top
+
+    def render(self, position, angle, out=None):
+        # position is (N, 2) world coordinates and angle (N,) degrees, e.g. a BatchLander's arrays
+        out = self.out if out is None else out
+        if self.tile_key != self.landscape.tileKey():
+            self.build_tile()
+        position = np.asarray(position, dtype=np.float64)
+        left, top = self.camera(position)
+
+        cols = np.mod(np.floor(left * self.scale).astype(np.int64)[:, None] + self.columns, self.tile_cols)
+        rows = np.floor(top * self.scale).astype(np.int64)[:, None] + self.rows
+        rows[(rows < 0) | (rows >= self.tile_rows)] = self.tile_rows
+        np.add((rows * self.tile_cols)[:, :, None], cols[:, None, :], out=self.index)
+        np.take(self.tile_flat, self.index, axis=0, out=out)
+
+        self.draw_landers(out, position, np.asarray(angle, dtype=np.float64), left, top)
+        return out
+
+    def draw_landers(self, out, position, angle, left, top):
+        # Alpha-blends the pre-rotated sprite stamp for each lander's angle over its view
+        stamp = self.stamp_size
+        x = np.floor((position[:, 0] - left) * self.scale).astype(np.int64) - stamp // 2
+        y = np.floor((position[:, 1] - top) * self.scale).astype(np.int64) - stamp // 2
+        turn = np.mod(np.rint(angle / self.angle_step).astype(np.int64), len(self.stamps))
+        px = x[:, None] + self.patch
+        py = y[:, None] + self.patch
+        visible = (self.alphas[turn] > 0) & ((py >= 0) & (py < self.height))[:, :, None] \
+            & ((px >= 0) & (px < self.width))[:, None, :]
+        n, r, c = np.nonzero(visible)
+        rows, cols, turn = py[n, r], px[n, c], turn[n]
+        alpha = self.alphas[turn, r, c][:, None]
+        out[n, rows, cols] = self.stamps[turn, r, c] + out[n, rows, cols] * (1 - alpha) + 0.5
+
+    def build_stamps(self, sprite):
+        # sprite is (h, w, 4) RGBA; each stamp is the sprite turned like resources.rotated and box-filtered
+        # to observation scale, stored premultiplied so drawing is a single blend
+        h, w = sprite.shape[:2]
+        scale = self.scale
+        stamp = int(math.ceil(math.hypot(w, h) * scale)) | 1
+        samples = max(1, int(math.ceil(1 / scale)))
+        self.stamp_size = stamp
+        self.patch = np.arange(stamp)
+
+        rgba = sprite.astype(np.float32) / 255
+        color = rgba[..., :3] * rgba[..., 3:]
+        if self.channels == 1:
+            color = color @ np.array([[0.299], [0.587], [0.114]], dtype=np.float32)
+        # Sub-pixel sample offsets from the stamp centre, in sprite pixels
+        sub = ((np.arange(samples) + 0.5) / samples - 0.5)
+        offset = (np.arange(stamp) - stamp // 2 + 0.5)[:, None] + sub[None, :]
+        offset = (offset / scale).reshape(-1)
+        dx, dy = np.meshgrid(offset, offset)
+
+        angles = np.radians(np.arange(0, 360, self.angle_step))
+        count = len(angles)
+        self.stamps = np.zeros((count, stamp, stamp, self.channels), dtype=np.float32)
+        self.alphas = np.zeros((count, stamp, stamp), dtype=np.float32)
+        for i, theta in enumerate(angles):
+            # Inverse of the on-screen rotation used by engine.Lander.update_box
+            sin, cos = math.sin(theta), math.cos(theta)
+            sx = np.floor(cos * dx + sin * dy + w / 2).astype(np.int64)
+            sy = np.floor(-sin * dx + cos * dy + h / 2).astype(np.int64)
+            inside = (sx >= 0) & (sx < w) & (sy >= 0) & (sy < h)
+            sx, sy = np.clip(sx, 0, w - 1), np.clip(sy, 0, h - 1)
+            a = np.where(inside, rgba[sy, sx, 3], 0)
+            rgb = np.where(inside[..., None], color[sy, sx], 0)
+            self.alphas[i] = a.reshape(stamp, samples, stamp, samples).mean(axis=(1, 3))
+            self.stamps[i] = 255 * rgb.reshape(stamp, samples, stamp, samples, -1).mean(axis=(1, 3))
+
+
+def load_sprite(path):
+    # Imported here so the renderer only needs pygame to decode the sprite, never a display
+    import pygame
+
+    image = pygame.image.load(path)
+    width, height = image.get_size()
+    return np.frombuffer(pygame.image.tobytes(image, 'RGBA'), dtype=np.uint8).reshape(height, width, 4)
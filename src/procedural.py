@@ -0,0 +1,125 @@
+import random
+from collections import OrderedDict
+
+from landscape import Landscape, LandingZone, Vector2
+
+# Generator units match Landscape.setupData before landscale is applied
+TILE_WIDTH = 600
+MIN_Y = 280
+MAX_Y = 465
+
+
+class ProceduralTile(Landscape):
+    # One generated tile; its edge heights depend only on (seed, edge index) so neighbours always join up
+    dataFile = None
+
+    def __init__(self, seed, index, landscale=1.5, depth=7, roughness=90, pads=3, edgeCount=None):
+        self.seed = seed
+        self.index = index
+        self.edgeCount = edgeCount
+        self.depth = depth
+        self.roughness = roughness
+        self.pads = pads
+        super().__init__(landscale)
+
+    def edgeHeight(self, edge):
+        if self.edgeCount:
+            # The last tile's right edge is the first tile's left edge
+            edge %= self.edgeCount
+        return random.Random(f"{self.seed}:edge:{edge}").uniform(MIN_Y, MAX_Y)
+
+    def starRandom(self):
+        # Stars depend only on (seed, index) too, so a tile rebuilt after eviction looks the same
+        return random.Random(f"{self.seed}:stars:{self.index}")
+
+    def setupData(self):
+        rng = random.Random(f"{self.seed}:tile:{self.index}")
+
+        # Midpoint displacement between the two fixed edge heights
+        count = 2 ** self.depth
+        heights = [0.0] * (count + 1)
+        heights[0] = self.edgeHeight(self.index)
+        heights[count] = self.edgeHeight(self.index + 1)
+        step = count
+        spread = self.roughness
+        while step > 1:
+            half = step // 2
+            for i in range(half, count, step):
+                middle = (heights[i - half] + heights[i + half]) / 2 + rng.uniform(-spread, spread)
+                heights[i] = max(MIN_Y, min(MAX_Y, middle))
+            step = half
+            spread /= 2
+
+        # Flatten a few runs into pads; each pad collapses into a single landable line
+        keep = [True] * (count + 1)
+        pads = []
+        for slot in range(self.pads):
+            # One pad per slot so pads never overlap or touch the tile edges
+            lo = 1 + slot * (count - 2) // self.pads
+            hi = 1 + (slot + 1) * (count - 2) // self.pads
+            length = rng.randint(2, 4)
+            if hi - lo <= length:
+                continue
+            start = rng.randrange(lo, hi - length)
+            for i in range(start + 1, start + length + 1):
+                heights[i] = heights[start]
+            for i in range(start + 1, start + length):
+                keep[i] = False
+            pads.append((start, length))
+
+        lineNums = {}
+        for i in range(count + 1):
+            if keep[i]:
+                lineNums[i] = len(self.points)
+                self.points.append(Vector2(i * TILE_WIDTH / count, heights[i]))
+
+        # Narrower pads are worth more
+        for start, length in pads:
+            self.availableZones.append(LandingZone(lineNums[start], 6 - length))
+        self.zoneCombis.append(list(range(len(self.availableZones))))
+
+
+class ProceduralLandscape:
+    # Unbounded-looking terrain built from ProceduralTiles made on first use and kept in an LRU cache
+    def __init__(self, seed=0, landscale=1.5, cacheSize=64, tileCount=2 ** 20, **tileOptions):
+        self.seed = seed
+        self.landscale = landscale
+        self.cacheSize = cacheSize
+        self.tileCount = tileCount
+        self.tileOptions = tileOptions
+        self.tiles = OrderedDict()
+        self.tileWidth = TILE_WIDTH * landscale
+        # The world still wraps, but only after tileCount distinct tiles
+        self.width = self.tileWidth * tileCount
+        self.height = (MAX_Y - 50) * landscale
+
+    def tile(self, index):
+        index %= self.tileCount
+        tile = self.tiles.get(index)
+        if tile is None:
+            tile = ProceduralTile(self.seed, index, self.landscale, edgeCount=self.tileCount, **self.tileOptions)
+            self.tiles[index] = tile
+            if len(self.tiles) > self.cacheSize:
+                self.tiles.popitem(last=False)
+        else:
+            self.tiles.move_to_end(index)
+        return tile
+
+    def segmentsNear(self, left, right):
+        near = []
+        for index in range(int(left // self.tileWidth), int(right // self.tileWidth) + 1):
+            offset = index * self.tileWidth
+            tile = self.tile(index)
+            near.append((tile, offset, tile.indicesInRange(left - offset, right - offset)))
+        return near
+
+    def heightAt(self, x):
+        index = int(x // self.tileWidth)
+        return self.tile(index).heightAt(x - index * self.tileWidth)
+
+    def render(self, surface, camera_rect):
+        start_tile = int(camera_rect.left // self.tileWidth)
+        end_tile = int((camera_rect.right + self.tileWidth - 1) // self.tileWidth)
+
+        for index in range(start_tile, end_tile + 1):
+            self.tile(index).renderTile(surface, camera_rect, index * self.tileWidth)
@@ -0,0 +1,101 @@
+import contextlib
+import csv
+import json
+import math
+import time
+from array import array
+
+# Phases of one game frame, in the order they run
+PHASES = ('events', 'physics', 'collision', 'camera', 'render', 'draw', 'flip')
+
+_disabled = contextlib.nullcontext()
+
+
+class _Timer:
+    # One reusable timer per phase so timing a phase allocates nothing
+    __slots__ = ('totals', 'name', 'start')
+
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.totals[self.name] += time.perf_counter() - self.start
+
+
+class FrameProfiler:
+    # Per-phase frame times in fixed-size ring buffers; phases entered several times in a frame add up
+    def __init__(self, phases=PHASES, size=600, enabled=False):
+        self.phases = tuple(phases)
+        self.size = size
+        self.enabled = enabled
+        # Switch asked for by toggle(); end_frame applies it, so a frame is always timed whole or not at all
+        self.requested = enabled
+        self.samples = {name: array('d', [0.0]) * size for name in self.phases}
+        self.totals = dict.fromkeys(self.phases, 0.0)
+        self.timers = {name: _Timer(self.totals, name) for name in self.phases}
+        self.index = 0
+        self.count = 0
+
+    def phase(self, name):
+        return self.timers[name] if self.enabled else _disabled
+
+    def toggle(self):
+        self.requested = not self.requested
+
+    def end_frame(self):
+        if self.enabled:
+            for name in self.phases:
+                self.samples[name][self.index] = self.totals[name]
+                self.totals[name] = 0.0
+            self.index = (self.index + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+        if self.requested != self.enabled:
+            self.enabled = self.requested
+            for name in self.phases:
+                self.totals[name] = 0.0
+
+    def clear(self):
+        for name in self.phases:
+            self.totals[name] = 0.0
+        self.index = 0
+        self.count = 0
+
+    def frames(self, name):
+        # Recorded seconds for one phase, oldest first
+        samples = self.samples[name]
+        if self.count < self.size:
+            return list(samples[:self.count])
+        return list(samples[self.index:]) + list(samples[:self.index])
+
+    def summary(self, percentiles=(50, 95, 99)):
+        # Milliseconds per phase: mean, max and the requested nearest-rank percentiles
+        result = {}
+        for name in self.phases:
+            values = sorted(self.frames(name))
+            if not values:
+                continue
+            stats = {'mean': sum(values) / len(values) * 1000, 'max': values[-1] * 1000}
+            for p in percentiles:
+                # The smallest value with at least p% of the frames at or below it
+                stats[f'p{p}'] = values[max(0, math.ceil(len(values) * p / 100) - 1)] * 1000
+            result[name] = stats
+        return result
+
+    def export(self, path):
+        # .csv writes one row of per-phase milliseconds per frame; anything else gets a JSON summary plus frames
+        columns = {name: self.frames(name) for name in self.phases}
+        if str(path).endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(('frame',) + self.phases)
+                for frame in range(self.count):
+                    writer.writerow([frame] + [columns[name][frame] * 1000 for name in self.phases])
+        else:
+            with open(path, 'w') as f:
+                json.dump({'frames': self.count, 'summary': self.summary(),
+                           'samples_ms': {name: [v * 1000 for v in values] for name, values in columns.items()}}, f)
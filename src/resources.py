@@ -0,0 +1,46 @@
+import pygame
+
+# Everything here is loaded on first use and kept for the life of the process
+_images = {}
+_fonts = {}
+_rotated = {}
+_labels = {}
+
+
+def image(path):
+    if path not in _images:
+        _images[path] = pygame.image.load(path).convert_alpha()
+    return _images[path]
+
+
+def font(name, size):
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = pygame.font.SysFont(name, size)
+    return _fonts[key]
+
+
+def rotated(path, angle, step=1):
+    # Sprite rotated by -angle, with angle snapped to a multiple of step degrees
+    snapped = round(angle / step) * step
+    key = (path, snapped)
+    if key not in _rotated:
+        _rotated[key] = pygame.transform.rotate(image(path), -snapped)
+    return _rotated[key]
+
+
+def label(slot, text, color=(255, 255, 255), name="Arial", size=18, antialias=True):
+    # Text surface for a HUD slot, rendered again only when its text or style changes
+    key = (text, color, name, size, antialias)
+    cached = _labels.get(slot)
+    if cached is None or cached[0] != key:
+        cached = (key, font(name, size).render(text, antialias, color))
+        _labels[slot] = cached
+    return cached[1]
+
+
+def clear():
+    _images.clear()
+    _fonts.clear()
+    _rotated.clear()
+    _labels.clear()
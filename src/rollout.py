@@ -0,0 +1,183 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch import CRASHED, LANDED, NONE, BatchLander, SegmentArrays
+from engine import THRUST
+from landscape import Landscape
+
+# Per-episode result columns streamed back from the workers
+COLUMNS = (
+    ('result', np.int8),
+    ('steps', np.int32),
+    ('fuel', np.int32),
+    ('burned', np.int32),
+    ('score', np.float32),
+    ('x', np.float32),
+    ('line', np.int32),
+)
+
+
+class SharedTerrain:
+    # One shared memory block holding every SegmentArrays buffer back to back
+    def __init__(self, segments):
+        self.layout = []
+        offset = 0
+        for name in SegmentArrays.ARRAYS:
+            array = np.ascontiguousarray(getattr(segments, name))
+            self.layout.append((name, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+        self.scalars = {name: getattr(segments, name) for name in SegmentArrays.SCALARS}
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, dtype, shape, start in self.layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=start)
+            view[...] = getattr(segments, name)
+
+    @property
+    def spec(self):
+        # Small picklable description that workers use to attach
+        return self.shm.name, self.layout, self.scalars
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(spec):
+    name, layout, scalars = spec
+    # Workers share the parent's resource tracker, so attaching again does not transfer ownership
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {field: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+              for field, dtype, shape, start in layout}
+    return shm, SegmentArrays.from_arrays(arrays, scalars)
+
+
+def descent_policy(lander, rng):
+    # Baseline controller: burn whenever the descent gets faster than a safe landing speed
+    return np.where(lander.velocity[:, 1] > 0.4, THRUST, 0)
+
+
+def random_policy(lander, rng):
+    return rng.integers(0, 8, lander.n)
+
+
+def threshold_policy(lander, rng):
+    # descent_policy with a per-episode burn threshold taken from the first controller parameter
+    return np.where(lander.velocity[:, 1] > lander.params[:, 0], THRUST, 0)
+
+
+def simulate(segments, starts, policy, max_steps, seed, frames=1):
+    # Runs every episode in starts (rows of x, y[, vx, vy, params...]) to completion as one batch.
+    # With frames > 1 the policy acts every `frames` physics frames and collisions are swept; steps still count frames
+    n = len(starts)
+    lander = BatchLander(n, None, segments=segments)
+    velocity = starts[:, 2:4] if starts.shape[1] >= 4 else 0
+    lander.reset(starts[:, :2], velocity=velocity)
+    # Columns past vx, vy are per-episode controller parameters for the policy
+    lander.params = starts[:, 4:]
+    rng = np.random.default_rng(seed)
+
+    out = {name: np.zeros(n, dtype=dtype) for name, dtype in COLUMNS}
+    out['line'][:] = -1
+    done = np.zeros(n, dtype=bool)
+
+    for step in range(0, max_steps, frames):
+        actions = np.where(done, 0, policy(lander, rng))
+        lander.step(actions, min(frames, max_steps - step))
+        codes, line = lander.check_collision()
+        codes[done] = NONE
+        finished = codes != NONE
+        # Fuel spent flying, before the landing bonus refills the tank
+        out['burned'][finished] = lander.initial_fuel - lander.fuel[finished]
+        lander.handle_landing(codes, line)
+        out['result'][finished] = codes[finished]
+        out['steps'][finished] = step + np.ceil(lander.impact[finished])
+        out['fuel'][finished] = lander.fuel[finished]
+        out['score'][finished] = lander.score[finished]
+        out['x'][finished] = lander.position[finished, 0]
+        out['line'][finished] = line[finished]
+        done |= finished
+        # Freeze finished landers so they stop moving while the rest of the batch runs
+        lander.landed |= finished
+        if done.all():
+            break
+
+    # Episodes that ran out of time keep result NONE
+    pending = ~done
+    out['steps'][pending] = max_steps
+    out['fuel'][pending] = lander.fuel[pending]
+    out['burned'][pending] = lander.initial_fuel - lander.fuel[pending]
+    out['x'][pending] = lander.position[pending, 0]
+    return out
+
+
+_segments = None
+_shm = None
+
+
+def _init_worker(spec):
+    global _segments, _shm
+    _shm, _segments = attach(spec)
+
+
+def _run_chunk(start, starts, policy, max_steps, seed, frames):
+    return start, simulate(_segments, starts, policy, max_steps, seed, frames)
+
+
+def chunks(starts, chunk):
+    # (first episode index, rows) pieces of at most chunk rows from one array or an iterable of arrays
+    blocks = [starts] if isinstance(starts, np.ndarray) else starts
+    first = 0
+    for block in blocks:
+        block = np.asarray(block, dtype=np.float64)
+        for i in range(0, len(block), chunk):
+            yield first + i, block[i:i + chunk]
+        first += len(block)
+
+
+def stream(starts, policy=descent_policy, landscape=None, workers=None, chunk=1024, max_steps=3000, seed=0,
+           inflight=None, frames=1):
+    # Yields (first episode index, result columns) per chunk as soon as a worker finishes it.
+    # starts may be a generator of blocks; only `inflight` chunks are queued at once, so memory stays bounded
+    landscape = landscape if landscape is not None else Landscape()
+    workers = workers or os.cpu_count()
+    inflight = inflight or 2 * workers
+    terrain = SharedTerrain(SegmentArrays(landscape))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(terrain.spec,)) as pool:
+            pending = set()
+            for first, rows in chunks(starts, chunk):
+                if len(pending) >= inflight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(_run_chunk, first, rows, policy, max_steps, seed + first, frames))
+            for future in as_completed(pending):
+                yield future.result()
+    finally:
+        terrain.close()
+
+
+def run(starts, **kwargs):
+    # Collects stream() into one set of columns in episode order
+    n = len(starts)
+    out = {name: np.zeros(n, dtype=dtype) for name, dtype in COLUMNS}
+    for first, columns in stream(starts, **kwargs):
+        for name, values in columns.items():
+            out[name][first:first + len(values)] = values
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    landscape = Landscape()
+    rng = np.random.default_rng(0)
+    starts = np.column_stack([rng.uniform(0, landscape.width, 100000), np.full(100000, 50.0)])
+    began = time.perf_counter()
+    results = run(starts, landscape=landscape)
+    elapsed = time.perf_counter() - began
+    counts = np.bincount(results['result'], minlength=3)
+    print(f"{len(starts)} episodes in {elapsed:.2f}s: {counts[LANDED]} landed, {counts[CRASHED]} crashed, {counts[NONE]} timed out")
@@ -0,0 +1,144 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+# File layout: one header, then fixed-size little-endian step records appended in order
+MAGIC = b'LLTR'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<IIffffffiBB')
+FIELDS = ('episode', 'step', 'x', 'y', 'vx', 'vy', 'angle', 'target_angle', 'fuel', 'action', 'result')
+
+# Same codes as batch.NONE/LANDED/CRASHED
+RESULTS = (None, 'landed', 'crashed')
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+Step = namedtuple('Step', FIELDS)
+
+# Records decoded per copy while iterating a TrajectoryReader
+ITER_BLOCK = 4096
+
+
+class TrajectoryWriter:
+    # Append-only log; records are buffered and written in blocks of `flush_every`
+    def __init__(self, path, flush_every=4096):
+        self.path = path
+        self.flush_every = flush_every
+        self.file = open(path, 'ab')
+        try:
+            size = self.file.tell()
+            if size == 0:
+                self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            else:
+                check_header(path)
+                # A writer interrupted mid-record leaves a partial tail; cut it off so new records stay aligned
+                count = (size - HEADER.size) // RECORD.size
+                if HEADER.size + count * RECORD.size != size:
+                    self.file.truncate(HEADER.size + count * RECORD.size)
+        except Exception:
+            self.file.close()
+            raise
+        self.buffer = bytearray()
+        self.pending = 0
+
+    def write(self, episode, step, position, velocity, angle, target_angle, fuel, action, result):
+        self.buffer += RECORD.pack(episode, step, position[0], position[1], velocity[0], velocity[1],
+                                   angle, target_angle, fuel, action, RESULT_CODES[result])
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def write_lander(self, episode, step, lander, action, result):
+        self.write(episode, step, lander.position, lander.velocity, lander.angle, lander.target_angle,
+                   lander.fuel, action, result)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def check_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+    magic, version, size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+
+
+class TrajectoryReader:
+    # Memory-mapped view of a trajectory file; records are decoded only when accessed
+    def __init__(self, path):
+        check_header(path)
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        # A writer may have been interrupted mid-record; ignore the partial tail
+        self.count = (size - HEADER.size) // RECORD.size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return decode(RECORD.unpack_from(self.map, HEADER.size + index * RECORD.size))
+
+    def __iter__(self):
+        # Decodes copies of ITER_BLOCK records at a time, so a suspended iterator holds no pointer into the map
+        # and close() still works
+        end = HEADER.size + self.count * RECORD.size
+        for start in range(HEADER.size, end, ITER_BLOCK * RECORD.size):
+            if self.map is None:
+                raise ValueError(f"{self.path} is closed")
+            for values in RECORD.iter_unpack(self.map[start:min(end, start + ITER_BLOCK * RECORD.size)]):
+                yield decode(values)
+
+    def episode(self, episode):
+        return [step for step in self if step.episode == episode]
+
+    def array(self):
+        # Zero-copy NumPy structured view of every record; drop it before close() unmaps the file
+        import numpy as np
+
+        dtype = np.dtype({'names': FIELDS,
+                          'formats': ['<u4', '<u4', '<f4', '<f4', '<f4', '<f4', '<f4', '<f4', '<i4', 'u1', 'u1'],
+                          'offsets': [0, 4, 8, 12, 16, 20, 24, 28, 32, 36, 37],
+                          'itemsize': RECORD.size})
+        if not self.count:
+            return np.zeros(0, dtype=dtype)
+        return np.frombuffer(self.map, dtype=dtype, count=self.count, offset=HEADER.size)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode(values):
+    return Step(*values[:-1], RESULTS[values[-1]])
@@ -0,0 +1,157 @@
+import argparse
+import time
+
+import numpy as np
+
+import rollout
+from batch import CRASHED, LANDED, NONE
+from landscape import Landscape
+
+
+class Sweep:
+    # Grid of start x bins x start vx bins x controller thresholds, with `samples` jittered episodes per cell
+    def __init__(self, landscape, x_bins=64, vx_bins=9, vx_range=(-1.0, 1.0), vy_max=0.5,
+                 thresholds=(0.2, 0.3, 0.4, 0.5), samples=64):
+        self.width = landscape.width
+        self.x_bins = x_bins
+        self.vx_bins = vx_bins
+        self.vx_range = vx_range
+        self.vy_max = vy_max
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.samples = samples
+        self.shape = (x_bins, vx_bins, len(self.thresholds))
+        self.cells = int(np.prod(self.shape))
+        self.episodes = self.cells * samples
+
+    def cell(self, index):
+        # Flat grid cell of each episode index; episodes are generated cell by cell
+        return index // self.samples
+
+    def starts(self, seed=0, block=65536):
+        # Yields (x, y, vx, vy, threshold) rows a block at a time, so the full sweep is never in memory
+        rng = np.random.default_rng(seed)
+        low, high = self.vx_range
+        for first in range(0, self.episodes, block):
+            index = np.arange(first, min(self.episodes, first + block))
+            xi, vi, ti = np.unravel_index(self.cell(index), self.shape)
+            n = len(index)
+            x = (xi + rng.random(n)) * self.width / self.x_bins
+            vx = low + (vi + rng.random(n)) * (high - low) / self.vx_bins
+            vy = rng.uniform(0, self.vy_max, n)
+            yield np.column_stack([x, np.full(n, 50.0), vx, vy, self.thresholds[ti]])
+
+
+class ZoneStats:
+    # Streaming per-cell counters; memory depends only on the grid and the number of zones
+    def __init__(self, landscape, sweep):
+        self.sweep = sweep
+        self.zones = landscape.availableZones
+        self.combis = landscape.zoneCombis
+        # Line index -> zone index, -1 for lines outside every zone
+        self.zone_of_line = np.full(len(landscape.lines), -1, dtype=np.int64)
+        for z, zone in enumerate(self.zones):
+            self.zone_of_line[zone.lineNum] = z
+
+        cells = sweep.cells
+        self.episodes = np.zeros(cells, dtype=np.int64)
+        self.crashed = np.zeros(cells, dtype=np.int64)
+        self.timed_out = np.zeros(cells, dtype=np.int64)
+        # Landings on landable lines outside every zone share the last row
+        self.landed = np.zeros((len(self.zones) + 1, cells), dtype=np.int64)
+        self.burned = np.zeros((len(self.zones) + 1, cells), dtype=np.float64)
+
+    def add(self, first, columns):
+        cell = self.sweep.cell(np.arange(first, first + len(columns['result'])))
+        result = columns['result']
+        np.add.at(self.episodes, cell, 1)
+        np.add.at(self.crashed, cell[result == CRASHED], 1)
+        np.add.at(self.timed_out, cell[result == NONE], 1)
+        landed = result == LANDED
+        zone = self.zone_of_line[columns['line'][landed]]
+        np.add.at(self.landed, (zone, cell[landed]), 1)
+        np.add.at(self.burned, (zone, cell[landed]), columns['burned'][landed])
+
+    def arrays(self):
+        # Heat maps shaped (zone or combi, x bin, vx bin, threshold); rates are NaN where nothing was flown
+        shape = self.sweep.shape
+        with np.errstate(divide='ignore', invalid='ignore'):
+            success = self.landed[:-1] / self.episodes
+            fuel = self.burned[:-1] / self.landed[:-1]
+        combi_success = np.array([success[combi].sum(axis=0) for combi in self.combis]).reshape((-1,) + shape)
+        return {
+            'episodes': self.episodes.reshape(shape),
+            'crashed': self.crashed.reshape(shape),
+            'timed_out': self.timed_out.reshape(shape),
+            'landed': self.landed[:-1].reshape((-1,) + shape),
+            'landed_elsewhere': self.landed[-1].reshape(shape),
+            'zone_success': success.reshape((-1,) + shape),
+            'zone_fuel': fuel.reshape((-1,) + shape),
+            'combi_success': combi_success,
+            'multipliers': np.array([zone.multiplier for zone in self.zones]),
+            'x_edges': np.linspace(0, self.sweep.width, self.sweep.x_bins + 1),
+            'vx_edges': np.linspace(*self.sweep.vx_range, self.sweep.vx_bins + 1),
+            'thresholds': self.sweep.thresholds,
+        }
+
+    def summary(self):
+        # Overall success probability and mean fuel burned per zone and per combination
+        total = self.episodes.sum()
+        landed = self.landed[:-1].sum(axis=1)
+        burned = self.burned[:-1].sum(axis=1)
+        zones = [{'zone': z, 'line': zone.lineNum, 'multiplier': zone.multiplier,
+                  'success': landed[z] / total if total else 0.0,
+                  'fuel': burned[z] / landed[z] if landed[z] else float('nan')}
+                 for z, zone in enumerate(self.zones)]
+        combis = []
+        for c, combi in enumerate(self.combis):
+            hits = landed[combi].sum()
+            combis.append({'combi': c, 'zones': list(combi),
+                           'success': hits / total if total else 0.0,
+                           'fuel': burned[combi].sum() / hits if hits else float('nan'),
+                           'expected_score': sum(100 * self.zones[z].multiplier * landed[z] for z in combi) / total if total else 0.0})
+        return zones, combis
+
+
+def analyze(landscape=None, sweep=None, seed=0, workers=None, chunk=4096, max_steps=3000, progress=None):
+    landscape = landscape if landscape is not None else Landscape()
+    sweep = sweep if sweep is not None else Sweep(landscape)
+    stats = ZoneStats(landscape, sweep)
+    for first, columns in rollout.stream(sweep.starts(seed), policy=rollout.threshold_policy, landscape=landscape,
+                                         workers=workers, chunk=chunk, max_steps=max_steps, seed=seed):
+        stats.add(first, columns)
+        if progress:
+            progress(stats.episodes.sum(), sweep.episodes)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo success and fuel estimates per landing zone.")
+    parser.add_argument("--x-bins", type=int, default=64)
+    parser.add_argument("--vx-bins", type=int, default=9)
+    parser.add_argument("--samples", type=int, default=64, help="episodes per grid cell")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.2, 0.3, 0.4, 0.5],
+                        help="descent speeds at which the controller starts burning")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="zones.npz", help="where to write the heat-map arrays")
+    args = parser.parse_args(argv)
+
+    landscape = Landscape()
+    sweep = Sweep(landscape, args.x_bins, args.vx_bins, thresholds=args.thresholds, samples=args.samples)
+    began = time.perf_counter()
+    stats = analyze(landscape, sweep, seed=args.seed, workers=args.workers)
+    elapsed = time.perf_counter() - began
+    np.savez_compressed(args.output, **stats.arrays())
+
+    zones, combis = stats.summary()
+    print(f"{sweep.episodes} episodes in {elapsed:.1f}s -> {args.output}")
+    for row in zones:
+        print(f"zone {row['zone']:2} line {row['line']:3} x{row['multiplier']}: "
+              f"success {row['success']:.4f}  fuel {row['fuel']:.0f}")
+    for row in combis:
+        print(f"combi {row['combi']} {row['zones']}: success {row['success']:.4f}  "
+              f"fuel {row['fuel']:.0f}  expected score {row['expected_score']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from arena import Arena, arrivals
+from batch import CRASHED, LANDED, NONE
+from engine import NOOP, Lander
+from landscape import Landscape
+
+SIZE = 15
+
+
+def brute_lander_contacts(arena, flying):
+    x, y = arena.lander.position[:, 0], arena.lander.position[:, 1]
+    live = ~arena.crashed
+    hit = np.zeros(arena.n, dtype=bool)
+    for i in range(arena.n):
+        for j in range(arena.n):
+            if i != j and live[i] and live[j]:
+                if abs(arena.wrapped(x[i] - x[j])) <= 2 * SIZE and abs(y[i] - y[j]) <= 2 * SIZE:
+                    hit[i] = True
+    return hit & flying
+
+
+def brute_pad_contacts(arena, flying):
+    x, y = arena.lander.position[:, 0], arena.lander.position[:, 1]
+    contact = np.full(arena.n, -1)
+    for i in np.flatnonzero(flying):
+        for p, (left, top, right, bottom, _) in enumerate(arena.pads):
+            middle = (left + right) / 2
+            shift = x[i] - arena.wrapped(x[i] - middle) - middle
+            if (x[i] + SIZE >= left + shift and x[i] - SIZE <= right + shift
+                    and y[i] + SIZE >= top and y[i] - SIZE <= bottom):
+                contact[i] = p
+                break
+    return contact
+
+
+def test_broad_phase_matches_brute_force():
+    landscape = Landscape()
+    rng = np.random.default_rng(0)
+    n = 300
+    pads = [(x, y, x + rng.uniform(20, 80), y + 4, 2) for x, y in rng.uniform((0, 0), (landscape.width, 500), (20, 2))]
+    arena = Arena(n, landscape, pads=pads)
+    # Crowded enough that many boxes touch, with some landers straddling the wrap at x = 0
+    x = np.concatenate([rng.uniform(0, landscape.width, n - 20), rng.uniform(-10, 10, 20) % landscape.width])
+    arena.reset(np.column_stack([x, rng.uniform(0, 500, n)]))
+    arena.crashed[rng.random(n) < 0.1] = True
+    flying = rng.random(n) < 0.8
+
+    hit = arena.lander_contacts(flying)
+    np.testing.assert_array_equal(hit, brute_lander_contacts(arena, flying))
+    assert hit.sum() > 10
+    contact = arena.pad_contacts(flying)
+    np.testing.assert_array_equal(contact, brute_pad_contacts(arena, flying))
+    assert (contact >= 0).sum() > 5
+
+
+def test_arrivals_count_earlier_entries_of_the_same_pad():
+    assert arrivals(np.array([3, 1, 3, 3, 1, 0])).tolist() == [0, 0, 1, 2, 1, 0]
+
+
+def clear_sky(landscape):
+    # An x where the sky is empty from the top down to y = 200
+    return next(x for x in range(100, int(landscape.width), 10) if landscape.heightAt(x) > 300)
+
+
+def test_pad_over_a_slope_still_crashes():
+    landscape = Landscape()
+    # The middle of a slope where the scalar lander, sitting still, touches no landable line first
+    lander = Lander([0, 0])
+    for line in landscape.lines:
+        x, y = (line.p1.x + line.p2.x) / 2, (line.p1.y + line.p2.y) / 2
+        lander.position[0], lander.position[1] = x, y - 1
+        if lander.find_contact(landscape)[0] == 'crashed':
+            break
+    arena = Arena(1, landscape, pads=[(x - 40, y - 5, x + 40, y + 5, 4)])
+    arena.reset([x, y - 1])
+    assert arena.step([NOOP]).tolist() == [CRASHED]
+    assert arena.lander.score[0] == 0
+    assert arena.occupancy.tolist() == [0]
+
+
+def test_gentle_touch_on_a_clear_pad_lands():
+    landscape = Landscape()
+    x = clear_sky(landscape)
+    arena = Arena(1, landscape, pads=[(x - 40, 110, x + 40, 112, 4)])
+    arena.reset([x, 100])
+    assert arena.step([NOOP]).tolist() == [LANDED]
+    assert arena.lander.score[0] == 400
+    assert arena.lander.position[0, 1] == 110 - SIZE
+    assert arena.step([NOOP]).tolist() == [NONE]
+
+
+def test_simultaneous_landings_share_the_pad_bonus():
+    landscape = Landscape()
+    x = clear_sky(landscape)
+    arena = Arena(3, landscape, pads=[(x - 100, 110, x + 100, 112, 4)])
+    # The first two touch down in the same step, far enough apart not to touch each other; the third one later
+    arena.reset(np.array([[x - 60, 100], [x + 60, 100], [x, 93]]))
+    assert arena.step([NOOP] * 3).tolist() == [LANDED, LANDED, NONE]
+    assert arena.lander.score[:2].tolist() == [400, 200]
+    assert arena.occupancy.tolist() == [2]
+    while arena.step([NOOP] * 3)[2] == NONE:
+        pass
+    assert arena.lander.score[2] == pytest.approx(400 / 3)
+    assert arena.occupancy.tolist() == [3]
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+import autopilot
+from autopilot import ACTIONS, Autopilot, Grid, advance, cache_path, interpolate, load_table, plan
+from engine import NOOP, THRUST, Lander
+from landscape import Landscape
+
+FRAMES = 8
+
+
+def coarse_grid():
+    # Small enough to plan in well under a second
+    return Grid(max_angle=15, fuel=(0, 1), max_height=80.0, heights=5, vy=np.linspace(-1, 3, 9), vx=(-1.0, 1.0, 5),
+                max_offset=40.0, offsets=5)
+
+
+@pytest.fixture(scope='module')
+def cache(tmp_path_factory):
+    # One planned table shared by the tests below
+    cache_dir = str(tmp_path_factory.mktemp('autopilot'))
+    load_table(coarse_grid(), frames=FRAMES, cache_dir=cache_dir)
+    return cache_dir
+
+
+def test_advance_follows_the_lander_physics():
+    grid = coarse_grid()
+    landscape = Landscape()
+    h, vy, vx, offset = (axis.ravel() for axis in np.meshgrid(*grid.axes, indexing='ij'))
+    for angle in (None, 0, 15):
+        corners, weights, contact, _ = advance(grid, 0.02, 0.04, FRAMES, angle)
+        np.testing.assert_allclose(weights.sum(axis=0), 1, rtol=1e-6)
+        end_height = interpolate(h[None, :].astype(np.float32), corners, weights)[0]
+        end_vx = interpolate(vx[None, :].astype(np.float32), corners, weights)[0]
+        for i in range(0, len(h), 37):
+            lander = Lander([300.0, 200.0])
+            lander.velocity[0], lander.velocity[1] = vx[i], vy[i]
+            for _ in range(FRAMES):
+                if angle is not None:
+                    lander.angle = angle
+                    lander.apply_thrust()
+                lander.update_position(landscape)
+            fall = lander.position[1] - 200.0
+            assert contact[i] == (h[i] - fall <= 0)
+            # The interpolated end state is exact wherever it falls inside the grid
+            if 0 <= h[i] - fall <= grid.height[-1]:
+                assert end_height[i] == pytest.approx(h[i] - fall, abs=1e-3)
+            if -1 <= lander.velocity[0] <= 1:
+                assert end_vx[i] == pytest.approx(lander.velocity[0], abs=1e-5)
+
+
+def test_plan_converges_to_a_sensible_table():
+    grid = coarse_grid()
+    changes = []
+    table = plan(grid, frames=FRAMES, progress=lambda iteration, change: changes.append(change))
+    assert table.shape == grid.shape and table.dtype == np.int8
+    assert changes[-1] < 1e-2 <= changes[0]
+    assert len(changes) < 1000
+    level, fuel = 1, 1
+    # High up and falling fast, a level lander with fuel burns; with an empty tank it never does
+    assert (table[level, fuel, -1, grid.vy >= 1, 2, 2] == ACTIONS.index(THRUST)).all()
+    assert not (table[:, 0] == ACTIONS.index(THRUST)).any()
+
+
+def test_load_table_plans_once_and_reuses_the_file(cache, monkeypatch):
+    grid = coarse_grid()
+    monkeypatch.setattr(autopilot, 'plan', lambda *args, **kwargs: pytest.fail("planned again"))
+    table = load_table(grid, frames=FRAMES, cache_dir=cache)
+    assert isinstance(table, np.memmap) and table.shape == grid.shape
+    # The temporary file was renamed into place
+    assert os.listdir(cache) == [os.path.basename(cache_path(grid, 0.02, 0.04, FRAMES, 150, cache))]
+
+
+def test_cache_key_covers_the_parameters():
+    grid = coarse_grid()
+    paths = {cache_path(grid, 0.02, 0.04, FRAMES, 150), cache_path(grid, 0.03, 0.04, FRAMES, 150),
+             cache_path(grid, 0.02, 0.04, 4, 150), cache_path(Grid(), 0.02, 0.04, FRAMES, 150)}
+    assert len(paths) == 4
+
+
+@pytest.mark.parametrize('content', [b'not a table', 'wrong shape'])
+def test_bad_cache_file_is_planned_again(tmp_path, monkeypatch, content):
+    grid = coarse_grid()
+    planned = []
+
+    def fake_plan(grid, *args, **kwargs):
+        planned.append(grid)
+        return np.zeros(grid.shape, dtype=np.int8)
+
+    monkeypatch.setattr(autopilot, 'plan', fake_plan)
+    path = cache_path(grid, 0.02, 0.04, FRAMES, 150, str(tmp_path))
+    if content == 'wrong shape':
+        np.save(path, np.zeros((2, 3), dtype=np.int8))
+    else:
+        with open(path, 'wb') as f:
+            f.write(content)
+    table = load_table(grid, frames=FRAMES, cache_dir=str(tmp_path))
+    assert planned and table.shape == grid.shape
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_hold_repeats_each_decision_for_the_planned_frames(cache, monkeypatch):
+    pilot = Autopilot(grid=coarse_grid(), frames=FRAMES, cache_dir=cache)
+    decisions = []
+
+    def action(lander):
+        decisions.append(len(decisions))
+        return THRUST if len(decisions) % 2 else NOOP
+
+    monkeypatch.setattr(pilot, 'action', action)
+    lander = Lander([300.0, 100.0])
+    held = [pilot.hold(lander) for _ in range(2 * FRAMES + 1)]
+    assert held == [THRUST] * FRAMES + [NOOP] * FRAMES + [THRUST]
+    assert len(decisions) == 3
+
+    # After a release the next call decides at once instead of finishing the hold
+    pilot.release()
+    assert pilot.hold(lander) == NOOP
+    assert len(decisions) == 4
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from batch import RESULTS, BatchLander, SegmentArrays, check_collision
+from engine import FPS, Lander, SimClock
+from landscape import Landscape
+
+
+def scalar_landers(batch):
+    clock = SimClock(FPS)
+    landers = []
+    for i in range(batch.n):
+        lander = Lander([batch.position[i, 0], batch.position[i, 1]], clock=clock.ticks)
+        lander.velocity[0], lander.velocity[1] = batch.velocity[i]
+        landers.append(lander)
+    return clock, landers
+
+
+def test_step_matches_scalar():
+    landscape = Landscape()
+    rng = np.random.default_rng(0)
+    n = 32
+    batch = BatchLander(n, landscape)
+    batch.reset(np.column_stack([rng.uniform(0, landscape.width, n), np.full(n, 40.0)]),
+                velocity=np.column_stack([rng.uniform(-1, 1, n), rng.uniform(-0.5, 0.5, n)]))
+    clock, landers = scalar_landers(batch)
+    for _ in range(200):
+        actions = rng.integers(0, 8, n)
+        batch.step(actions)
+        for lander, action in zip(landers, actions):
+            if action & 1:
+                lander.rotate_left()
+            if action & 2:
+                lander.rotate_right()
+            if action & 4:
+                lander.apply_thrust()
+            lander.update_position(landscape)
+            lander.update_rotation()
+        clock.tick()
+        expected = np.array([(*l.position, *l.velocity, l.angle, l.target_angle, l.fuel) for l in landers])
+        actual = np.column_stack([batch.position, batch.velocity, batch.angle, batch.target_angle, batch.fuel])
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('bucket_width', [32, 48, 5])
+def test_collision_matches_scalar(bucket_width):
+    # 5 is much narrower than the lander box, which then spans several buckets
+    landscape = Landscape()
+    landscape.buildLineIndex(bucket_width)
+    segments = SegmentArrays(landscape)
+    rng = np.random.default_rng(1)
+    n = 4000
+    x = rng.uniform(0, 2 * landscape.width, n)
+    y = np.array([landscape.lineAt(v % landscape.tileWidth)[1] for v in x]) + rng.uniform(-40, 20, n)
+    position = np.column_stack([x, y])
+    angle = rng.choice([-10.0, -5.0, 0.0, 3.0, 5.0, 12.0], n)
+    velocity = rng.uniform(-0.8, 0.8, (n, 2))
+    codes, line = check_collision(segments, position, angle, velocity)
+
+    lander = Lander([0.0, 0.0])
+    for i in range(n):
+        lander.position[0], lander.position[1] = position[i]
+        lander.angle = angle[i]
+        lander.velocity[0], lander.velocity[1] = velocity[i]
+        result, hit = lander.find_contact(landscape)
+        assert RESULTS[codes[i]] == result
+        assert line[i] == (-1 if hit is None else hit.index)
+    assert (codes != 0).sum() > n // 4
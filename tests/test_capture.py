@@ -0,0 +1,68 @@
+import os
+import threading
+
+import pygame
+import pytest
+
+import capture
+from capture import FrameCapture
+
+
+def frame(size, shade):
+    surface = pygame.Surface(size)
+    surface.fill((shade, 255 - shade, 7))
+    return surface
+
+
+def test_every_captured_frame_is_written(tmp_path):
+    # More buffers than frames, so none can be dropped however slow the writer is
+    with FrameCapture(str(tmp_path), (64, 48), buffers=16) as recorder:
+        assert all(recorder.capture(frame((64, 48), i)) for i in range(10))
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == recorder.frames == 10
+    assert pygame.image.load(os.path.join(tmp_path, files[-1])).get_at((3, 3))[:3] == (9, 246, 7)
+
+
+def test_full_pool_drops_frames(tmp_path, monkeypatch):
+    # The writer stalls on its first frame, so the pool drains and later frames are dropped, not waited for
+    release = threading.Event()
+    save = pygame.image.save
+
+    def slow_save(*args):
+        release.wait()
+        save(*args)
+
+    monkeypatch.setattr(capture.pygame.image, 'save', slow_save)
+    recorder = FrameCapture(str(tmp_path), (32, 32), buffers=2)
+    results = [recorder.capture(frame((32, 32), i)) for i in range(5)]
+    assert results == [True, True, False, False, False]
+    assert recorder.dropped == 3
+    release.set()
+    recorder.close()
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_png_capture_follows_a_resize(tmp_path):
+    with FrameCapture(str(tmp_path), (40, 30), buffers=2) as recorder:
+        for size in ((40, 30), (40, 30), (50, 20), (50, 20)):
+            assert recorder.capture(frame(size, 100))
+    sizes = [pygame.image.load(os.path.join(tmp_path, name)).get_size() for name in sorted(os.listdir(tmp_path))]
+    assert sizes == [(40, 30), (40, 30), (50, 20), (50, 20)]
+    assert recorder.dropped == 0
+
+
+def test_raw_capture_drops_other_sizes(tmp_path, capsys):
+    path = tmp_path / 'frames.rgb'
+    with FrameCapture(str(path), (8, 4), mode='raw') as recorder:
+        assert recorder.capture(frame((8, 4), 1))
+        assert not recorder.capture(frame((6, 4), 1))
+        assert not recorder.capture(frame((6, 4), 1))
+        assert recorder.capture(frame((8, 4), 1))
+    assert path.stat().st_size == 2 * 8 * 4 * 3
+    assert recorder.dropped == 2
+    assert capsys.readouterr().err.count("raw stream drops") == 1
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        FrameCapture(str(tmp_path), (8, 8), mode='gif')
@@ -0,0 +1,86 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+import pytest
+
+import game
+from landscape import Landscape
+
+SIZE = (1000, 700)
+
+
+@pytest.fixture
+def screen():
+    pygame.display.init()
+    yield pygame.display.set_mode(SIZE)
+    pygame.display.quit()
+
+
+def draw(surface, camera, landscape, full):
+    # One frame as the game draws it: terrain when asked, then a sprite and a fixed HUD box
+    if full:
+        surface.fill((0, 0, 0))
+        landscape.render(surface, camera.rect)
+    sprite = pygame.draw.rect(surface, (255, 0, 0), (camera.rect.width // 2, 300, 30, 30))
+    hud = surface.fill((0, 0, 255), (10, 10, 120, 20))
+    return [sprite, hud]
+
+
+def frame(dirty, surface, camera, landscape, left, top=0):
+    camera.rect.topleft = left, top
+    full = dirty.begin(surface, camera, landscape)
+    rects = draw(surface, camera, landscape, full)
+    updates = dirty.updates + rects
+    dirty.end(rects)
+    return full, updates
+
+
+@pytest.mark.parametrize('dx, dy', [(3, 0), (-7, 0), (40, 0), (0, 5), (6, -4)])
+def test_scrolled_frame_updates_only_what_changed(screen, dx, dy):
+    landscape = Landscape()
+    camera = game.Camera(*SIZE)
+    dirty = game.DirtyRects()
+    assert frame(dirty, screen, camera, landscape, 200, -50)[0]
+    before = pygame.surfarray.array3d(screen)
+
+    full, updates = frame(dirty, screen, camera, landscape, 200 + dx, -50 + dy)
+    assert not full
+    after = pygame.surfarray.array3d(screen)
+
+    # The scrolled back buffer is what a full redraw would have drawn
+    reference = pygame.Surface(SIZE)
+    draw(reference, camera, landscape, True)
+    np.testing.assert_array_equal(after, pygame.surfarray.array3d(reference))
+
+    # Every changed pixel is pushed, and far from the whole window is
+    covered = np.zeros(SIZE, dtype=bool)
+    for rect in updates:
+        rect = pygame.Rect(rect).clip(screen.get_rect())
+        covered[rect.left:rect.right, rect.top:rect.bottom] = True
+    changed = (before != after).any(axis=2)
+    assert not (changed & ~covered).any()
+    assert covered.mean() < 0.6
+
+
+def test_still_camera_updates_last_and_new_rects(screen):
+    landscape = Landscape()
+    camera = game.Camera(*SIZE)
+    dirty = game.DirtyRects()
+    frame(dirty, screen, camera, landscape, 100)
+    full, updates = frame(dirty, screen, camera, landscape, 100)
+    assert not full
+    assert len(updates) == 4
+
+
+def test_wrap_or_resize_redraws_everything(screen):
+    landscape = Landscape()
+    camera = game.Camera(*SIZE)
+    dirty = game.DirtyRects()
+    frame(dirty, screen, camera, landscape, 5)
+    assert frame(dirty, screen, camera, landscape, 5 + int(landscape.width) - 2)[0]
+    dirty.size = (1, 1)
+    assert frame(dirty, screen, camera, landscape, 5)[0]
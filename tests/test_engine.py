@@ -0,0 +1,75 @@
+import math
+import random
+
+from engine import FPS, NOOP, ROTATE_LEFT, ROTATE_RIGHT, THRUST, Engine
+from landscape import Landscape
+
+
+class BaselineLander:
+    # The per-frame rules of the original game loop, with pygame.time.get_ticks() replaced by simulated ticks
+    def __init__(self, position):
+        self.position = list(position)
+        self.angle = 0
+        self.target_angle = 0
+        self.velocity = [0, 0]
+        self.fuel = 1000
+        self.last_rotation_time = 0
+
+    def step(self, action, now, landscape):
+        if action & ROTATE_LEFT and now - self.last_rotation_time >= 150:
+            self.target_angle = max(-90, self.target_angle - 15)
+            self.last_rotation_time = now
+        if action & ROTATE_RIGHT and now - self.last_rotation_time >= 150:
+            self.target_angle = min(90, self.target_angle + 15)
+            self.last_rotation_time = now
+        if action & THRUST and self.fuel > 0:
+            self.velocity[0] += math.sin(math.radians(self.angle)) * 0.04
+            self.velocity[1] -= math.cos(math.radians(self.angle)) * 0.04
+            self.fuel -= 1
+        self.velocity[1] += 0.02
+        self.position[0] += self.velocity[0]
+        self.position[1] += self.velocity[1]
+        self.position[0] = self.position[0] % landscape.width
+        self.position[1] = max(0, min(self.position[1], landscape.height))
+        if self.angle < self.target_angle:
+            self.angle = min(self.angle + 1.75, self.target_angle)
+        elif self.angle > self.target_angle:
+            self.angle = max(self.angle - 1.75, self.target_angle)
+
+    def state(self):
+        return (self.position[0], self.position[1], self.velocity[0], self.velocity[1], self.angle, self.target_angle,
+                self.fuel)
+
+
+def random_actions(seed, count):
+    rng = random.Random(seed)
+    return [rng.choice((NOOP, ROTATE_LEFT, ROTATE_RIGHT, THRUST, THRUST | ROTATE_LEFT, THRUST | ROTATE_RIGHT))
+            for _ in range(count)]
+
+
+def test_engine_matches_baseline_physics():
+    landscape = Landscape()
+    engine = Engine(landscape, start=[300, 50])
+    baseline = BaselineLander([300, 50])
+    for step, action in enumerate(random_actions(1, 400)):
+        state, result = engine.step(action)
+        if result is not None:
+            break
+        baseline.step(action, step * 1000 // FPS, landscape)
+        assert state == baseline.state()
+    assert step > 100
+
+
+def test_engine_is_deterministic():
+    landscape = Landscape()
+    for frames in (1, 8):
+        runs = []
+        for _ in range(2):
+            engine = Engine(landscape, seed=7)
+            trace = []
+            for action in random_actions(2, 3000 // frames):
+                trace.append(engine.step(action, frames))
+                if engine.done:
+                    trace.append(engine.reset())
+            runs.append(trace)
+        assert runs[0] == runs[1]
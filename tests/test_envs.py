@@ -0,0 +1,64 @@
+import numpy as np
+
+from envs import LanderEnv, LanderVectorEnv
+from landscape import Landscape
+
+# Observation columns compared between the envs; altitude comes from different terrain lookups
+STATE = slice(0, 6)
+
+
+def test_autoreset_vector_env_matches_scalar_env():
+    landscape = Landscape()
+    vector = LanderVectorEnv(3, landscape, max_steps=40)
+    vector.reset(seed=0)
+    # Sink the first lander into the ground: it crashes at once, so from then on it is reset on its own
+    x = vector.lander.position[0, 0]
+    vector.lander.position[0, 1] = landscape.heightAt(x) - 14
+    rng = np.random.default_rng(0)
+    episodes = [[(vector.lander.position[i].copy(), [])] for i in range(vector.num_envs)]
+    for _ in range(300):
+        resetting = vector.needs_reset.copy()
+        actions = rng.integers(0, 8, vector.num_envs)
+        observations, rewards, terminated, truncated, _ = vector.step(actions)
+        for i in range(vector.num_envs):
+            if resetting[i]:
+                episodes[i].append((vector.lander.position[i].copy(), []))
+            else:
+                episodes[i][-1][1].append((actions[i], observations[i].copy(), rewards[i], terminated[i], truncated[i]))
+
+    scalar = LanderEnv(landscape, max_steps=40)
+    compared = 0
+    for runs in episodes:
+        # Every env went through several episodes, so autoreset ones are covered
+        assert len(runs) > 2
+        for start, steps in runs:
+            observation, _ = scalar.reset(options={'position': list(start)})
+            for action, expected, reward, done, cut in steps:
+                observation, got_reward, got_done, got_cut, _ = scalar.step(action)
+                np.testing.assert_allclose(observation[STATE], expected[STATE], atol=1e-4)
+                assert (got_reward, got_done, got_cut) == (reward, done, cut)
+                compared += 1
+    assert compared > 600
+
+
+def test_pixel_observations_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    vector = LanderVectorEnv(2, pixels={'size': (32, 32), 'grayscale': True})
+    observations, _ = vector.reset(seed=0)
+    assert observations.shape == (2, 32, 32, 1) and observations.dtype == np.uint8
+    assert observations.any()
+    observations, *_ = vector.step(np.zeros(2, dtype=np.int64))
+    assert vector.observation_space.contains(observations)
+
+
+def test_vector_env_follows_zone_changes():
+    landscape = Landscape()
+    vector = LanderVectorEnv(2, landscape)
+    vector.reset(seed=0)
+    before = vector.heights()
+    landscape.setZoneCombi(1)
+    vector.step(np.zeros(2, dtype=np.int64))
+    after = vector.heights()
+    assert after is not before
+    np.testing.assert_array_equal(after.pad_distance, np.frombuffer(landscape.heightMap().padDistance, dtype=np.float32))
+    assert not np.array_equal(after.pad_distance, before.pad_distance)
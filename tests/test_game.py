@@ -0,0 +1,56 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+import game
+import resources
+from trajectory import TrajectoryReader
+
+
+def run_frames(monkeypatch, frames, **kwargs):
+    # game.main for a fixed number of frames, then a QUIT event
+    calls = []
+    get = pygame.event.get
+
+    def events(*args, **kw):
+        calls.append(None)
+        return [pygame.event.Event(pygame.QUIT)] if len(calls) > frames else get(*args, **kw)
+
+    monkeypatch.setattr(pygame.event, 'get', events)
+    monkeypatch.setattr(game, 'current_game_state', game.GameState.IN_GAME)
+    game.sim_clock.reset()
+    try:
+        game.main(**kwargs)
+    finally:
+        resources.clear()
+
+
+def test_recorded_steps_start_at_zero(tmp_path, monkeypatch):
+    path = tmp_path / 'game.bin'
+    run_frames(monkeypatch, 30, record_path=str(path))
+    with TrajectoryReader(path) as reader:
+        steps = [step.step for step in reader]
+    assert steps[:3] == [0, 1, 2]
+
+
+def test_draw_reuses_the_screen_position_and_icon_rect():
+    pygame.init()
+    try:
+        screen = pygame.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+        lander = game.Lander([game.landscape.width - 3.5, 300.25], angle=37)
+        camera = game.Camera(game.WINDOW_WIDTH, game.WINDOW_HEIGHT)
+        camera.update(lander.position, game.landscape)
+        screen_pos, icon_rect = lander.screen_pos, lander.icon_rect
+        for _ in range(2):
+            lander.draw(screen, camera)
+        assert lander.screen_pos is screen_pos and lander.icon_rect is icon_rect
+        x = (lander.position[0] - camera.rect.left) % game.landscape.width
+        icon = resources.rotated("assets/lander.png", lander.angle)
+        assert screen_pos == [x, lander.position[1] - camera.rect.top]
+        assert icon_rect == icon.get_rect(center=(x, lander.position[1] - camera.rect.top))
+    finally:
+        resources.clear()
+        pygame.display.quit()
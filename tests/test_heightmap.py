@@ -0,0 +1,21 @@
+import math
+
+from landscape import Landscape
+
+
+def test_ground_matches_lines():
+    landscape = Landscape()
+    heightmap = landscape.heightMap()
+    for x in range(0, int(landscape.tileWidth), 7):
+        assert math.isclose(heightmap.groundAt(x), landscape.lineAt(x)[1], abs_tol=1.0)
+
+
+def test_stale_zone_combination_is_rebuilt():
+    landscape = Landscape()
+    first = landscape.heightMap()
+    landscape.currentCombi = 1
+    second = landscape.heightMap()
+    assert second is not first
+    assert second.currentCombi == 1
+    assert list(second.padDistance) != list(first.padDistance)
+    assert landscape.heightMap() is second
@@ -0,0 +1,39 @@
+import random
+
+from engine import Engine
+from landfile import DEFAULT_PATH, save
+from landscape import Landscape
+
+
+def test_regenerated_file_is_byte_identical(tmp_path):
+    random.seed(0)
+    path = tmp_path / 'default.landscape'
+    save(Landscape(1.5, path=''), path)
+    with open(DEFAULT_PATH, 'rb') as shipped:
+        assert path.read_bytes() == shipped.read()
+
+
+def test_loaded_landscape_matches_built():
+    random.seed(0)
+    built = Landscape(1.5, path='')
+    loaded = Landscape()
+    for name in ('px', 'py', 'x1', 'y1', 'x2', 'y2', 'landable', 'multiplier', 'starX', 'starY'):
+        assert list(getattr(loaded, name)) == list(getattr(built, name)), name
+    assert (loaded.tileWidth, loaded.height) == (built.tileWidth, built.height)
+    assert loaded.zoneCombis == built.zoneCombis
+    assert [(z.lineNum, z.multiplier) for z in loaded.availableZones] == \
+        [(z.lineNum, z.multiplier) for z in built.availableZones]
+
+
+def test_loaded_landscape_gives_same_outcomes():
+    random.seed(0)
+    built = Landscape(1.5, path='')
+    loaded = Landscape()
+    for x in range(0, 880, 40):
+        results = []
+        for landscape in (built, loaded):
+            engine = Engine(landscape, start=[x, 50])
+            while not engine.done and engine.steps < 3000:
+                engine.step()
+            results.append((engine.result, engine.steps, engine.state()))
+        assert results[0] == results[1]
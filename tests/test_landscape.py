@@ -0,0 +1,34 @@
+import pytest
+
+from landscape import Landscape
+
+
+def test_line_index_is_built_on_first_use():
+    landscape = Landscape()
+    assert 'buckets' not in vars(landscape)
+    assert sum(len(bucket) for bucket in landscape.buckets) >= len(landscape.x1)
+    assert 'buckets' in vars(landscape)
+    with pytest.raises(AttributeError):
+        landscape.notAnAttribute
+
+
+def test_line_index_finds_every_overlapping_line():
+    landscape = Landscape()
+    landscape.buildLineIndex(48)
+    for left in range(-20, int(landscape.tileWidth), 13):
+        right = left + 30
+        found = set(landscape.indicesInRange(left, right))
+        for i, (xa, xb) in enumerate(zip(landscape.x1, landscape.x2)):
+            if min(xa, xb) <= right and max(xa, xb) >= left:
+                assert i in found
+
+
+def test_zone_switch_keeps_the_cached_tile():
+    pygame = pytest.importorskip('pygame')
+    landscape = Landscape()
+    camera_rect = pygame.Rect(0, 0, 400, 300)
+    landscape.render(pygame.Surface(camera_rect.size), camera_rect)
+    tile = landscape.tileSurface
+    landscape.setZoneCombi(landscape.currentCombi + 1)
+    landscape.render(pygame.Surface(camera_rect.size), camera_rect)
+    assert landscape.tileSurface is tile
@@ -0,0 +1,31 @@
+import random
+
+from procedural import ProceduralLandscape, ProceduralTile
+
+
+def tile_data(tile):
+    return list(tile.px), list(tile.py), list(tile.starX), list(tile.starY)
+
+
+def test_tile_depends_only_on_seed_and_index():
+    random.seed(1)
+    first = tile_data(ProceduralTile(5, 3))
+    random.seed(2)
+    assert tile_data(ProceduralTile(5, 3)) == first
+    assert tile_data(ProceduralTile(5, 4)) != first
+
+
+def test_building_tiles_leaves_global_rng_alone():
+    random.seed(3)
+    expected = random.random()
+    random.seed(3)
+    ProceduralTile(0, 0)
+    assert random.random() == expected
+
+
+def test_evicted_tile_is_rebuilt_identically():
+    world = ProceduralLandscape(seed=9, cacheSize=1)
+    first = tile_data(world.tile(0))
+    world.tile(1)
+    assert 0 not in world.tiles
+    assert tile_data(world.tile(0)) == first
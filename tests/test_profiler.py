@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from profiler import FrameProfiler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # perf_counter that only moves when the test advances it
+    now = [0.0]
+    monkeypatch.setattr(time, 'perf_counter', lambda: now[0])
+    return now
+
+
+def run_frame(profiler, clock, durations):
+    # One frame spending durations[name] seconds in each listed phase
+    for name, seconds in durations:
+        with profiler.phase(name):
+            clock[0] += seconds
+    profiler.end_frame()
+
+
+def test_phases_entered_twice_add_up(clock):
+    profiler = FrameProfiler(phases=('physics', 'draw'), size=4, enabled=True)
+    run_frame(profiler, clock, [('physics', 0.002), ('draw', 0.005), ('physics', 0.003)])
+    run_frame(profiler, clock, [('draw', 0.001)])
+    assert profiler.frames('physics') == pytest.approx([0.005, 0.0])
+    assert profiler.frames('draw') == pytest.approx([0.005, 0.001])
+
+
+def test_ring_buffer_keeps_the_latest_frames(clock):
+    profiler = FrameProfiler(phases=('physics',), size=3, enabled=True)
+    for ms in range(1, 6):
+        run_frame(profiler, clock, [('physics', ms / 1000)])
+    assert profiler.frames('physics') == pytest.approx([0.003, 0.004, 0.005])
+
+
+def test_summary_uses_nearest_rank_percentiles(clock):
+    profiler = FrameProfiler(phases=('physics',), size=200, enabled=True)
+    for ms in range(100, 0, -1):
+        run_frame(profiler, clock, [('physics', ms / 1000)])
+    stats = profiler.summary(percentiles=(1, 50, 95, 99, 100))['physics']
+    assert stats['mean'] == pytest.approx(50.5)
+    assert stats['max'] == pytest.approx(100)
+    for p in (1, 50, 95, 99, 100):
+        assert stats[f'p{p}'] == pytest.approx(p)
+
+
+def test_toggle_waits_for_the_frame_boundary(clock):
+    profiler = FrameProfiler(phases=('events', 'physics'), size=8, enabled=True)
+    # Switched off during a frame: that frame is still recorded in full
+    with profiler.phase('events'):
+        clock[0] += 0.001
+    profiler.toggle()
+    with profiler.phase('physics'):
+        clock[0] += 0.002
+    profiler.end_frame()
+    assert not profiler.enabled
+    run_frame(profiler, clock, [('events', 0.004), ('physics', 0.004)])
+
+    # Switched on during a frame: timing starts with the next one
+    with profiler.phase('events'):
+        clock[0] += 0.008
+    profiler.toggle()
+    with profiler.phase('physics'):
+        clock[0] += 0.008
+    profiler.end_frame()
+    assert profiler.enabled
+    run_frame(profiler, clock, [('events', 0.003), ('physics', 0.005)])
+
+    assert profiler.frames('events') == pytest.approx([0.001, 0.003])
+    assert profiler.frames('physics') == pytest.approx([0.002, 0.005])
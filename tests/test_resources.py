@@ -0,0 +1,34 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import pytest
+
+import resources
+
+
+@pytest.fixture(autouse=True)
+def fonts():
+    pygame.font.init()
+    resources.clear()
+    yield
+    resources.clear()
+
+
+def test_same_label_is_rendered_once():
+    first = resources.label('score', "Score: 10")
+    assert resources.label('score', "Score: 10") is first
+    assert len(resources._labels) == 1
+    assert resources.label('score', "Score: 20") is not first
+    assert len(resources._labels) == 1
+
+
+def test_menu_buttons_share_one_label():
+    import game
+
+    surface = pygame.Surface((400, 300))
+    for _ in range(50):
+        game.Button(100, 100, 200, 80, 'Start').draw(surface, (0, 0, 0))
+    assert len(resources._labels) == 1
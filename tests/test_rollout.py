@@ -0,0 +1,64 @@
+import numpy as np
+
+from batch import SegmentArrays
+from landscape import Landscape
+from rollout import COLUMNS, SharedTerrain, attach, descent_policy, random_policy, run, simulate, stream
+
+
+MAX_STEPS = 300
+
+
+def random_starts(landscape, n, seed=0):
+    # Starts a little above the ground, so most episodes end within MAX_STEPS
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, landscape.width, n)
+    y = np.array([landscape.heightAt(v) for v in x]) - 15 - rng.uniform(5, 60, n)
+    return np.column_stack([x, y, rng.uniform(-0.3, 0.3, n), rng.uniform(-0.3, 0.3, n)])
+
+
+def test_attach_sees_the_parent_arrays():
+    segments = SegmentArrays(Landscape())
+    terrain = SharedTerrain(segments)
+    try:
+        shm, attached = attach(terrain.spec)
+        for name in SegmentArrays.ARRAYS:
+            np.testing.assert_array_equal(getattr(attached, name), getattr(segments, name))
+        for name in SegmentArrays.SCALARS:
+            assert getattr(attached, name) == getattr(segments, name)
+        del attached
+        shm.close()
+    finally:
+        terrain.close()
+
+
+def test_workers_match_a_single_process():
+    landscape = Landscape()
+    segments = SegmentArrays(landscape)
+    starts = random_starts(landscape, 400)
+    for policy, frames in ((descent_policy, 1), (random_policy, 4)):
+        results = run(starts, policy=policy, landscape=landscape, workers=2, chunk=100, max_steps=MAX_STEPS, seed=5,
+                      frames=frames)
+        # Each chunk seeds its own policy RNG with seed plus its first episode index
+        expected = [simulate(segments, starts[i:i + 100], policy, MAX_STEPS, 5 + i, frames) for i in range(0, 400, 100)]
+        for name, _ in COLUMNS:
+            np.testing.assert_array_equal(results[name], np.concatenate([chunk[name] for chunk in expected]))
+        counts = np.bincount(results['result'], minlength=3)
+        assert counts.sum() == 400 and counts[0] < 40
+
+
+def test_stream_keeps_at_most_inflight_chunks_queued():
+    landscape = Landscape()
+    starts = random_starts(landscape, 240)
+    pulled = []
+
+    def blocks():
+        for i in range(0, len(starts), 20):
+            pulled.append(i)
+            yield starts[i:i + 20]
+
+    received = 0
+    for first, columns in stream(blocks(), landscape=landscape, workers=2, chunk=20, max_steps=100, inflight=3):
+        received += 1
+        # The block just pulled waits in the loop until a queue slot frees up
+        assert len(pulled) - received <= 3
+    assert received == len(pulled) == 12
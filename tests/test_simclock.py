@@ -0,0 +1,49 @@
+from engine import ROTATE_LEFT, Engine, Lander, SimClock
+
+
+def test_advance_carries_the_remainder():
+    clock = SimClock(fps=100)
+    assert clock.advance(25) == 2
+    assert clock.alpha == 0.5
+    assert clock.advance(5) == 1
+    assert clock.alpha == 0
+
+
+def test_advance_drops_backlog_past_max_steps():
+    clock = SimClock(fps=100, max_steps=4)
+    assert clock.advance(1000) == 4
+    assert clock.accumulator == 0
+    assert clock.advance(10) == 1
+
+
+def test_ticks_follow_steps_not_wall_time():
+    clock = SimClock(fps=120)
+    for _ in range(120):
+        clock.tick()
+    assert clock.ticks() == 1000
+    clock.reset()
+    assert (clock.steps, clock.ticks()) == (0, 0)
+
+
+def test_rotation_is_gated_on_simulated_ticks():
+    clock = SimClock(fps=120)
+    lander = Lander([0, 0], clock=clock.ticks)
+    lander.last_rotation_time = -1000
+    lander.rotate_left()
+    assert lander.target_angle == -15
+    # 150 ms is 18 steps at 120 fps; one step short the rotation is still locked out
+    for _ in range(17):
+        clock.tick()
+    lander.rotate_left()
+    assert lander.target_angle == -15
+    clock.tick()
+    lander.rotate_left()
+    assert lander.target_angle == -30
+
+
+def test_engine_frames_match_single_steps():
+    single, multi = Engine(start=[300, 50]), Engine(start=[300, 50])
+    for _ in range(5):
+        for _ in range(8):
+            expected = single.step(ROTATE_LEFT)
+        assert multi.step(ROTATE_LEFT, 8) == expected
@@ -0,0 +1,69 @@
+from engine import LANDER_STATE, NOOP, ROTATE_LEFT, THRUST, Engine, Lander
+from landscape import Landscape
+
+
+def play(engine, actions):
+    return [engine.step(action) for action in actions]
+
+
+def test_engine_restore_replays_exactly():
+    engine = Engine(Landscape(), start=[400, 50])
+    play(engine, [THRUST | ROTATE_LEFT] * 30)
+    saved = engine.snapshot()
+    actions = [NOOP, THRUST, ROTATE_LEFT, THRUST] * 40
+    first = play(engine, actions)
+    after = engine.snapshot()
+
+    engine.restore(saved)
+    assert engine.snapshot() == saved
+    assert play(engine, actions) == first
+    assert engine.snapshot() == after
+
+
+def test_snapshot_into_buffer_matches_bytes():
+    engine = Engine(Landscape(), start=[200, 80])
+    play(engine, [THRUST] * 12)
+    buffer = bytearray(len(engine.snapshot()))
+    assert engine.snapshot(buffer) is buffer
+    assert bytes(buffer) == engine.snapshot()
+
+
+def test_lander_round_trip():
+    lander = Lander([123.5, 45.25], angle=30, initial_fuel=700)
+    lander.velocity[0], lander.velocity[1] = 0.3, -0.7
+    lander.target_angle = -15
+    lander.last_rotation_time = 1234
+    lander.score = 250
+    data = lander.snapshot()
+    assert len(data) == LANDER_STATE.size
+
+    other = Lander([0, 0])
+    other.restore(data)
+    assert other.snapshot() == data
+    assert (other.angle, other.sin, other.cos) == (lander.angle, lander.sin, lander.cos)
+
+
+def test_restore_then_reset_draws_the_same_start():
+    engine = Engine(Landscape(), seed=3)
+    play(engine, [THRUST] * 5)
+    engine.reset()
+    saved = engine.snapshot()
+    first = [engine.reset()] + play(engine, [NOOP, THRUST] * 20) + [engine.reset()]
+
+    engine.reset()
+    engine.reset()
+    engine.restore(saved)
+    assert [engine.reset()] + play(engine, [NOOP, THRUST] * 20) + [engine.reset()] == first
+
+
+def test_restore_brings_back_impact():
+    engine = Engine(Landscape(), start=[400, 50])
+    while not engine.done:
+        engine.step(NOOP, 8)
+    saved = engine.snapshot()
+    impact = engine.impact
+    assert impact is not None
+    engine.reset()
+    assert engine.impact is None
+    engine.restore(saved)
+    assert engine.impact == impact
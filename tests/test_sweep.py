@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+
+from batch import NONE, RESULTS, BatchLander, SegmentArrays
+from engine import NOOP, Engine, Lander, segment_hits_box, segment_sweeps_box
+from landscape import Landscape
+
+SAMPLES = 1000
+
+
+def hits_at(t, x, y, dx, dy, size, segment, grow=0.0):
+    cx, cy = x + t * dx, y + t * dy
+    r = size + grow
+    return segment_hits_box(cx - r, cy - r, cx + r, cy + r, *segment)
+
+
+def test_sweep_matches_time_sampling():
+    rng = random.Random(0)
+    size = 15
+    for _ in range(1000):
+        segment = [rng.uniform(-60, 60) for _ in range(4)]
+        x, y = rng.uniform(-80, 80), rng.uniform(-80, 80)
+        dx, dy = rng.uniform(-80, 80), rng.uniform(-80, 80)
+        t = segment_sweeps_box(x, y, dx, dy, size, *segment)
+        sampled = next((i / SAMPLES for i in range(SAMPLES + 1) if hits_at(i / SAMPLES, x, y, dx, dy, size, segment)),
+                       None)
+        if t is None:
+            assert sampled is None
+        else:
+            # The box touches at t, and no sample before it does
+            assert 0 <= t <= 1
+            assert hits_at(t, x, y, dx, dy, size, segment, grow=1e-6)
+            assert sampled is None or sampled >= t - 1e-9
+
+
+def test_batch_sweep_matches_scalar():
+    landscape = Landscape()
+    segments = SegmentArrays(landscape)
+    rng = np.random.default_rng(0)
+    n = 3000
+    x = rng.uniform(0, landscape.width, n)
+    y = np.array([landscape.heightAt(v) for v in x]) - rng.uniform(10, 80, n)
+    start = np.column_stack([x, y])
+    delta = np.column_stack([rng.uniform(-20, 20, n), rng.uniform(-10, 60, n)])
+    line, t = segments.first_sweep(start, delta, 15)
+
+    hits = 0
+    for i in range(n):
+        lander = Lander([x[i], y[i]])
+        _, hit, expected = lander.sweep_contact(landscape, (x[i], y[i], 0.0, 0.0, 0.0), delta[i, 0], delta[i, 1])
+        if hit is None:
+            assert line[i] == -1
+        else:
+            assert line[i] == hit.index
+            assert abs(t[i] - expected) <= 1e-9
+            hits += 1
+    assert hits > n // 4
+
+
+def test_parked_lander_reports_the_same_at_any_frames():
+    landscape = Landscape()
+    pad = next(line for line in landscape.lines if line.landable and line.p2.x - line.p1.x > 20)
+    start = [(pad.p1.x + pad.p2.x) / 2, pad.p1.y - 16]
+
+    engine = Engine(landscape, start=start)
+    batch = BatchLander(1, landscape)
+    batch.reset(start)
+    while engine.step()[1] is None:
+        pass
+    while batch.collide()[0] == NONE:
+        batch.step(NOOP)
+    assert engine.lander.landed and batch.landed[0]
+
+    for frames in (1, 8):
+        _, result = engine.step(NOOP, frames)
+        batch.step(NOOP, frames)
+        codes, line = batch.check_collision()
+        assert result == RESULTS[codes[0]] == 'landed'
+        assert line[0] == pad.index
+        assert batch.impact[0] == engine.impact
+        assert batch.position[0].tolist() == engine.lander.position
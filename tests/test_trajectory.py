@@ -0,0 +1,67 @@
+import pytest
+
+import trajectory
+from trajectory import HEADER, RECORD, TrajectoryReader, TrajectoryWriter
+
+
+def write_steps(path, episode, count):
+    with TrajectoryWriter(path) as writer:
+        for step in range(count):
+            writer.write(episode, step, (step, 2.0 * step), (0.5, -0.25), 3.0, 15.0, 1000 - step, 4,
+                         'landed' if step == count - 1 else None)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'log.bin'
+    write_steps(path, 0, 5)
+    write_steps(path, 1, 3)
+    with TrajectoryReader(path) as reader:
+        steps = list(reader)
+        assert len(reader) == 8
+        assert reader[-1] == steps[-1]
+    assert [s.episode for s in steps] == [0] * 5 + [1] * 3
+    assert steps[4].result == 'landed' and steps[0].result is None
+    assert (steps[2].x, steps[2].y, steps[2].fuel) == (2.0, 4.0, 998)
+
+
+def test_reopening_torn_log_drops_partial_record(tmp_path):
+    path = tmp_path / 'log.bin'
+    write_steps(path, 0, 4)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    write_steps(path, 1, 2)
+    assert path.stat().st_size == HEADER.size + 6 * RECORD.size
+    with TrajectoryReader(path) as reader:
+        steps = list(reader)
+    assert [(s.episode, s.step) for s in steps] == [(0, 0), (0, 1), (0, 2), (0, 3), (1, 0), (1, 1)]
+
+
+def test_close_during_iteration(tmp_path):
+    path = tmp_path / 'log.bin'
+    write_steps(path, 0, 10)
+    reader = TrajectoryReader(path)
+    steps = iter(reader)
+    next(steps)
+    reader.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'log.bin'
+    path.write_bytes(b'LL')
+    with pytest.raises(ValueError):
+        TrajectoryWriter(path)
+
+
+def test_writer_closes_its_file_on_a_bad_header(tmp_path, monkeypatch):
+    path = tmp_path / 'log.bin'
+    path.write_bytes(b'not a trajectory file')
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(trajectory, 'open', tracking_open, raising=False)
+    with pytest.raises(ValueError):
+        TrajectoryWriter(path)
+    assert opened and all(f.closed for f in opened)
@@ -0,0 +1,46 @@
+import numpy as np
+
+import zones
+from landscape import Landscape
+from zones import Sweep, analyze
+
+
+def two_zone_landscape():
+    landscape = Landscape()
+    landscape.availableZones = landscape.availableZones[:2]
+    landscape.zoneCombis = [[0, 1], [1]]
+    return landscape
+
+
+def small_sweep(landscape):
+    return Sweep(landscape, x_bins=6, vx_bins=2, thresholds=(0.3, 0.5), samples=4)
+
+
+def test_analyze_is_deterministic_and_counts_every_episode():
+    landscape = two_zone_landscape()
+    sweep = small_sweep(landscape)
+    runs = [analyze(landscape, sweep, seed=3, workers=2, chunk=16, max_steps=400).arrays() for _ in range(2)]
+    first, second = runs
+    for name in first:
+        np.testing.assert_allclose(first[name], second[name])
+
+    assert first['episodes'].shape == sweep.shape and (first['episodes'] == 4).all()
+    assert first['landed'].shape == first['zone_success'].shape == (2,) + sweep.shape
+    assert first['combi_success'].shape == (2,) + sweep.shape
+    total = first['crashed'] + first['timed_out'] + first['landed'].sum(axis=0) + first['landed_elsewhere']
+    np.testing.assert_array_equal(total, first['episodes'])
+    for name in ('zone_success', 'combi_success'):
+        assert ((first[name] >= 0) & (first[name] <= 1)).all()
+
+
+def test_main_writes_the_heat_maps(tmp_path):
+    path = tmp_path / 'zones.npz'
+    zones.main(['--x-bins', '4', '--vx-bins', '2', '--samples', '2', '--thresholds', '0.3',
+                '--workers', '2', '--seed', '1', '--output', str(path)])
+    with np.load(path) as data:
+        assert set(data.files) == {'episodes', 'crashed', 'timed_out', 'landed', 'landed_elsewhere', 'zone_success',
+                                   'zone_fuel', 'combi_success', 'multipliers', 'x_edges', 'vx_edges', 'thresholds'}
+        assert data['episodes'].sum() == 4 * 2 * 2
+        success = data['zone_success']
+        assert success.shape[0] == len(data['multipliers'])
+        assert ((success >= 0) & (success <= 1)).all()